@@ -1,5 +1,26 @@
-import openai
-from anthropic import Anthropic
+import asyncio
+import copy
+import logging
+import time
+from provider_clients import get_provider_client
+from utils.response_cache import ResponseCache, get_response_cache
+from utils.request_scheduler import get_request_scheduler
+from utils.metrics import registry, ERRORS
+from utils.provider_router import get_provider_router
+
+SYSTEM_PROMPT = "You are a helpful assistant in a chat conversation."
+
+AI_REQUEST_SECONDS = registry.histogram(
+    'teams_chat_ai_request_seconds', 'AI provider request latency', ['provider', 'model', 'mode'])
+AI_FIRST_CHUNK_SECONDS = registry.histogram(
+    'teams_chat_ai_first_chunk_seconds', 'Time until the first streamed chunk arrives', ['provider', 'model'])
+
+def estimate_tokens(text):
+    """Cheap provider-agnostic token estimate (~4 characters per token plus per-message overhead)"""
+    return len(text) // 4 + 4
+
+class AIResponseError(Exception):
+    """No provider returned a reply; the message is meant for logs and the requesting user, not for a chat"""
 
 class AIHandler:
     def __init__(self, config, service_type, logger):
@@ -7,77 +28,318 @@ class AIHandler:
         self.config = config.get('ai_services', {})
         self.logger = logger
         self.conversation_history = []
-        
-        self.logger.debug(f"Initializing {service_type} handler")
-        if service_type == 'openai':
-            openai.api_key = self.config['openai']['api_key']
-            self.model = self.config['openai']['model']
-            self.logger.debug(f"Using OpenAI model: {self.model}")
-            # Initialize with system message
-            self.conversation_history = [
-                {"role": "system", "content": "You are a helpful assistant in a chat conversation."}
-            ]
-        elif service_type == 'claude':
-            self.anthropic = Anthropic(api_key=self.config['anthropic']['api_key'])
-            self.model = self.config['anthropic']['model']
-            self.logger.debug(f"Using Claude model: {self.model}")
+        # Serializes async requests so concurrent calls can't interleave one conversation's history
+        self._lock = asyncio.Lock()
+
+        history_config = self.config.get('history', {})
+        self.max_history_tokens = history_config.get('max_tokens', 4000)
+        self.summarize_history = history_config.get('summarize', True)
+        self.summary_max_chars = history_config.get('summary_max_chars', 2000)
+        self.history_summary = ""
+        self._token_counts = {}  # (role, content): estimated tokens
+        self.response_cache = get_response_cache(self.config)
+        self.scheduler = get_request_scheduler(config)
+
+        self.logger.debug("Initializing %s handler", service_type)
+        # 'auto' answers from whichever configured provider is fastest, see ai_services.routing
+        self.router = get_provider_router(config) if service_type == 'auto' else None
+        self.providers = self.router.providers if self.router else [service_type]
+        self.models = {}
+        if 'openai' in self.providers:
+            # Shared with every handler using the same key; nothing is set on the openai module
+            self.async_openai = get_provider_client('openai', self.config['openai']['api_key'])
+            self.models['openai'] = self.config['openai']['model']
+            self.logger.debug("Using OpenAI model: %s", self.models['openai'])
+        if 'claude' in self.providers:
+            self.async_anthropic = get_provider_client('anthropic', self.config['anthropic']['api_key'])
+            self.models['claude'] = self.config['anthropic']['model']
+            self.logger.debug("Using Claude model: %s", self.models['claude'])
+        if self.models:
+            # The model of the provider that gave the latest answer
+            self.model = self.models[self.providers[0]]
             # Initialize with system message
             self.conversation_history = [
-                {"role": "system", "content": "You are a helpful assistant in a chat conversation."}
+                {"role": "system", "content": SYSTEM_PROMPT}
             ]
-    
-    def get_ai_response(self, prompt):
-        try:
-            self.logger.debug(f"Sending request to {self.service_type}")
-            
-            if self.service_type == 'openai':
-                # Add user message to history
-                self.conversation_history.append({"role": "user", "content": prompt})
-                
-                response = openai.chat.completions.create(
-                    model=self.config['openai']['model'],
-                    messages=self.conversation_history,
-                    max_tokens=self.config['openai']['max_tokens'],
-                    temperature=self.config['openai']['temperature']
+
+    def _message_tokens(self, message):
+        key = (message["role"], message["content"])
+        if key not in self._token_counts:
+            self._token_counts[key] = estimate_tokens(message["content"])
+        return self._token_counts[key]
+
+    def _system_message(self, summary=None):
+        summary = self.history_summary if summary is None else summary
+        content = SYSTEM_PROMPT
+        if summary:
+            content += f"\n\nSummary of the earlier conversation:\n{summary}"
+        return {"role": "system", "content": content}
+
+    def _fold(self, dropped):
+        """history_summary with the dropped turns appended, or unchanged when summarizing is off"""
+        if not self.summarize_history:
+            return self.history_summary
+        folded = "\n".join(f"{m['role']}: {' '.join(m['content'].split())[:200]}" for m in dropped)
+        summary = f"{self.history_summary}\n{folded}".strip()
+        # Older lines fall off the front once the summary itself is over its limit
+        if len(summary) > self.summary_max_chars:
+            summary = summary[-self.summary_max_chars:].split("\n", 1)[-1]
+        return summary
+
+    def _compact_history(self):
+        """Keep the history within the token budget by folding the oldest turns into a summary"""
+        turns = [m for m in self.conversation_history if m["role"] != "system"]
+        total = sum(self._message_tokens(m) for m in self.conversation_history)
+        if total <= self.max_history_tokens or len(turns) <= 1:
+            return
+
+        # Walk back from the newest turn, keeping as many as fit next to the system message. Folding the
+        # dropped turns grows the summary, so walk again against the new system message until nothing more goes
+        summary = self.history_summary
+        keep_from = 0
+        while True:
+            budget = self.max_history_tokens - self._message_tokens(self._system_message(summary))
+            start = len(turns) - 1
+            used = self._message_tokens(turns[start])
+            while start > keep_from and used + self._message_tokens(turns[start - 1]) <= budget:
+                start -= 1
+                used += self._message_tokens(turns[start])
+            # Both providers expect the conversation to open with a user turn
+            while start < len(turns) - 1 and turns[start]["role"] != "user":
+                start += 1
+            if start == keep_from:
+                break
+            keep_from = start
+            summary = self._fold(turns[:keep_from])
+
+        dropped, kept = turns[:keep_from], turns[keep_from:]
+        self.history_summary = summary
+        self.conversation_history = [self._system_message()] + kept
+        self._token_counts = {(m["role"], m["content"]): self._message_tokens(m) for m in self.conversation_history}
+        self.logger.debug("Compacted conversation history: dropped %d messages, kept %d", len(dropped), len(kept))
+
+    def _add_user_message(self, prompt):
+        self.conversation_history.append({"role": "user", "content": prompt})
+        self._compact_history()
+
+    def _discard_prompt(self, prompt):
+        """Drop a prompt that was cancelled before any reply, so the history keeps alternating"""
+        if self.conversation_history and self.conversation_history[-1] == {"role": "user", "content": prompt}:
+            self.conversation_history.pop()
+
+    def _openai_request(self):
+        return {
+            "model": self.config['openai']['model'],
+            "messages": self.conversation_history,
+            "max_tokens": self.config['openai']['max_tokens'],
+            "temperature": self.config['openai']['temperature']
+        }
+
+    def _claude_request(self):
+        # The Messages API takes the system prompt as a separate parameter, not as a message
+        system = "\n\n".join(m["content"] for m in self.conversation_history if m["role"] == "system")
+        return {
+            "model": self.config['anthropic']['model'],
+            "max_tokens": self.config['anthropic']['max_tokens'],
+            "temperature": self.config['anthropic']['temperature'],
+            "system": system,
+            "messages": [m for m in self.conversation_history if m["role"] != "system"]
+        }
+
+    def _provider_request(self, provider=None):
+        if (provider or self.providers[0]) == 'openai':
+            return self._openai_request()
+        return self._claude_request()
+
+    async def _create_completion_async(self, request, provider=None):
+        provider = provider or self.providers[0]
+        with AI_REQUEST_SECONDS.time(provider=provider, model=self.models[provider], mode='complete'):
+            if provider == 'openai':
+                response = await self.scheduler.run(
+                    'openai', lambda: self.async_openai.chat.completions.create(**request)
                 )
-                
-                # Add assistant's response to history
-                assistant_message = response.choices[0].message.content
-                self.conversation_history.append({"role": "assistant", "content": assistant_message})
-                
-                self.logger.debug("Received response from OpenAI")
-                return assistant_message, self.model
-                
-            elif self.service_type == 'claude':
-                # Add user message to history
-                self.conversation_history.append({"role": "user", "content": prompt})
-                
-                response = self.anthropic.messages.create(
-                    model=self.config['anthropic']['model'],
-                    max_tokens=self.config['anthropic']['max_tokens'],
-                    temperature=self.config['anthropic']['temperature'],
-                    messages=self.conversation_history
+                return response.choices[0].message.content
+            elif provider == 'claude':
+                response = await self.scheduler.run(
+                    'anthropic', lambda: self.async_anthropic.messages.create(**request)
                 )
-                
-                # Add assistant's response to history
-                assistant_message = response.content[0].text
+                return response.content[0].text
+
+    async def _route_completion(self):
+        """Ask the routed providers for the reply; every request is built from the same history"""
+        requests = {provider: self._provider_request(provider) for provider in self.providers}
+        provider, assistant_message = await self.router.run({
+            provider: lambda provider=provider: self._create_completion_async(requests[provider], provider)
+            for provider in self.providers
+        })
+        self.model = self.models[provider]
+        return assistant_message
+
+    async def _open_stream(self, provider, request):
+        """Start a streamed reply and wait for its first chunk; returns (first chunk, remaining chunks)"""
+        if provider == 'openai':
+            stream = await self.scheduler.run(
+                'openai', lambda: self.async_openai.chat.completions.create(**request, stream=True)
+            )
+        else:
+            stream = await self.scheduler.run(
+                'anthropic', lambda: self.async_anthropic.messages.create(**request, stream=True)
+            )
+        chunks = self._stream_chunks(provider, stream)
+        try:
+            return await anext(chunks, None), chunks
+        except BaseException:
+            await chunks.aclose()
+            raise
+
+    async def _stream_chunks(self, provider, stream):
+        try:
+            async for event in stream:
+                if provider == 'openai':
+                    if event.choices and event.choices[0].delta.content:
+                        yield event.choices[0].delta.content
+                elif event.type == 'content_block_delta' and event.delta.type == 'text_delta':
+                    yield event.delta.text
+        finally:
+            # Releases the HTTP response of a stream that was abandoned, e.g. a cancelled hedge
+            close = getattr(stream, 'close', None) or getattr(stream, 'aclose', None)
+            if close:
+                await close()
+
+    def _observe_first_chunk(self, started, provider):
+        AI_FIRST_CHUNK_SECONDS.observe(time.perf_counter() - started, provider=provider, model=self.models[provider])
+
+    async def get_ai_response_async(self, prompt):
+        """Return (reply, model) for a prompt; raises AIResponseError when no provider could answer"""
+        async with self._lock:
+            try:
+                self.logger.debug("Sending async request to %s", self.service_type)
+                self._add_user_message(prompt)
+                request = self._provider_request()
+                if self.router:
+                    compute = self._route_completion
+                else:
+                    compute = lambda: self._create_completion_async(request)
+
+                if self.response_cache:
+                    key = ResponseCache.make_key(self.service_type, request)
+                    assistant_message = await self.response_cache.get_or_compute(key, compute)
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug("Response cache stats: %s", self.response_cache.stats())
+                else:
+                    assistant_message = await compute()
+
+                # Only the winning reply reaches the history, so it reads the same whichever provider answered
                 self.conversation_history.append({"role": "assistant", "content": assistant_message})
-                
-                self.logger.debug("Received response from Claude")
+                self.logger.debug("Received response from %s", self.model)
                 return assistant_message, self.model
-                
-        except Exception as e:
-            self.logger.error(f"Error in AI response: {str(e)}")
-            return f"Error getting AI response: {str(e)}", "ERROR"
-    
+
+            except asyncio.CancelledError:
+                self._discard_prompt(prompt)
+                raise
+            except Exception as e:
+                ERRORS.inc(component='ai')
+                self.logger.error(f"Error in AI response: {str(e)}")
+                # The unanswered prompt is dropped so the history keeps alternating
+                self._discard_prompt(prompt)
+                raise AIResponseError(f"Error getting AI response: {str(e)}") from e
+
+    async def stream_ai_response(self, prompt):
+        """Yield the assistant reply in chunks as the provider produces them.
+
+        The complete reply is added to the conversation history once the stream finishes.
+        """
+        async with self._lock:
+            self.logger.debug("Sending streaming request to %s", self.service_type)
+            self._add_user_message(prompt)
+            chunks = []
+
+            cache_key = None
+            if self.response_cache:
+                cache_key = ResponseCache.make_key(self.service_type, self._provider_request())
+                try:
+                    cached = await self.response_cache.lookup(cache_key)
+                except asyncio.CancelledError:
+                    self._discard_prompt(prompt)
+                    raise
+                if cached is not None:
+                    self.conversation_history.append({"role": "assistant", "content": cached})
+                    yield cached
+                    return
+
+            started = time.perf_counter()
+            provider = self.providers[0]
+            try:
+                if self.router:
+                    # Routed streams race to their first chunk; the rest is read from the winner only
+                    requests = {p: self._provider_request(p) for p in self.providers}
+                    provider, (first, remaining) = await self.router.run(
+                        {p: lambda p=p: self._open_stream(p, requests[p]) for p in self.providers},
+                        mode='stream', discard=lambda opened: opened[1].aclose()
+                    )
+                    self.model = self.models[provider]
+                else:
+                    first, remaining = await self._open_stream(provider, self._provider_request())
+
+                try:
+                    if first is not None:
+                        self._observe_first_chunk(started, provider)
+                        chunks.append(first)
+                        yield first
+                    async for chunk in remaining:
+                        chunks.append(chunk)
+                        yield chunk
+                finally:
+                    await remaining.aclose()
+
+            except asyncio.CancelledError:
+                if not chunks:
+                    self._discard_prompt(prompt)
+                raise
+            except Exception as e:
+                ERRORS.inc(component='ai')
+                self.logger.error(f"Error in AI response stream: {str(e)}")
+                raise
+            finally:
+                AI_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started, provider=provider, model=self.models[provider], mode='stream')
+                # Keep whatever was generated, even if the stream was cut short
+                if chunks:
+                    self.conversation_history.append({"role": "assistant", "content": "".join(chunks)})
+
+            if cache_key and chunks:
+                self.response_cache.set(cache_key, "".join(chunks))
+
+            self.logger.debug("Finished streaming response from %s", provider)
+
+    def export_state(self):
+        """Serializable conversation state, e.g. for a session store"""
+        return {
+            "service_type": self.service_type,
+            "conversation_history": self.conversation_history,
+            "history_summary": self.history_summary
+        }
+
+    def restore_state(self, state):
+        self.conversation_history = [dict(m) for m in state.get("conversation_history", [])]
+        self.history_summary = state.get("history_summary", "")
+        self._token_counts = {}
+        self._compact_history()
+
+    def new_conversation(self):
+        """A handler sharing this one's providers and clients, with its own empty history and lock"""
+        handler = copy.copy(self)
+        handler._lock = asyncio.Lock()
+        handler.conversation_history = []
+        handler.clear_conversation()
+        return handler
+
     def clear_conversation(self):
         """Reset the conversation history"""
-        if self.service_type == 'openai':
-            self.conversation_history = [
-                {"role": "system", "content": "You are a helpful assistant in a chat conversation."}
-            ]
-        elif self.service_type == 'claude':
+        self.history_summary = ""
+        self._token_counts = {}
+        if self.models:
             self.conversation_history = [
-                {"role": "system", "content": "You are a helpful assistant in a chat conversation."}
+                {"role": "system", "content": SYSTEM_PROMPT}
             ]
-        self.logger.debug("Conversation history cleared")
\ No newline at end of file
+        self.logger.debug("Conversation history cleared")
@@ -0,0 +1,207 @@
+"""In-process stand-ins for the Graph, OpenAI and Anthropic clients used by the benchmarks"""
+
+import asyncio
+import itertools
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from msgraph.generated.models.aad_user_conversation_member import AadUserConversationMember
+from msgraph.generated.models.chat import Chat
+from msgraph.generated.models.chat_message import ChatMessage
+from msgraph.generated.models.chat_message_from_identity_set import ChatMessageFromIdentitySet
+from msgraph.generated.models.identity import Identity
+from msgraph.generated.models.item_body import ItemBody
+
+FILTER_PATTERN = re.compile(r"lastModifiedDateTime gt (\S+)")
+
+def quiet_logger():
+    """A 'teams_chat'-style logger that discards everything, so console I/O stays out of the numbers"""
+    logger = logging.getLogger('benchmarks.quiet')
+    logger.handlers = [logging.NullHandler()]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.chat = lambda msg, color='chat_user': None
+    logger.error_colored = lambda msg: None
+    logger.flush = lambda: None
+    return logger
+
+def payload(size, seed=''):
+    text = f"{seed} " if seed else ''
+    return (text + 'lorem ipsum dolor sit amet ' * (size // 27 + 1))[:size]
+
+class FakeChatFeed:
+    """Message history of one chat; every list call first 'receives' messages_per_poll new messages"""
+
+    def __init__(self, chat_id, messages_per_poll, payload_size, ai_trigger_ratio):
+        self.chat_id = chat_id
+        self.messages_per_poll = messages_per_poll
+        self.payload_size = payload_size
+        self.ai_trigger_ratio = ai_trigger_ratio
+        self.messages = []  # oldest first
+        self.clock = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.members = [
+            AadUserConversationMember(id=f"m{i}", user_id=f"u{i}", display_name=f"User {i}",
+                                      roles=['owner'] if i == 0 else [])
+            for i in range(5)
+        ]
+
+    def receive(self):
+        for _ in range(self.messages_per_poll):
+            index = len(self.messages)
+            self.clock += timedelta(milliseconds=50)
+            triggers_ai = self.ai_trigger_ratio and index % round(1 / self.ai_trigger_ratio) == 0
+            content = payload(self.payload_size, f"!hi AI! question {index}" if triggers_ai else f"message {index}")
+            self.messages.append(ChatMessage(
+                id=str(index),
+                created_date_time=self.clock,
+                last_modified_date_time=self.clock,
+                body=ItemBody(content=content),
+                from_=ChatMessageFromIdentitySet(user=Identity(display_name=f"User {index % 5}"))
+            ))
+
+class FakeGraphServiceClient:
+    """Enough of GraphServiceClient for TeamsGroupChatCreator: chats, messages and members"""
+
+    def __init__(self, latency=0.0, messages_per_poll=5, payload_size=200, ai_trigger_ratio=0.0):
+        self.latency = latency
+        self.messages_per_poll = messages_per_poll
+        self.payload_size = payload_size
+        self.ai_trigger_ratio = ai_trigger_ratio
+        self.feeds = {}  # chat_id: FakeChatFeed
+        self.calls = {}  # operation: count
+        self.chats = _Chats(self)
+
+    def feed(self, chat_id):
+        if chat_id not in self.feeds:
+            self.feeds[chat_id] = FakeChatFeed(chat_id, self.messages_per_poll, self.payload_size, self.ai_trigger_ratio)
+        return self.feeds[chat_id]
+
+    async def call(self, operation):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+class _Chats:
+    def __init__(self, client):
+        self.client = client
+
+    def by_chat_id(self, chat_id):
+        return SimpleNamespace(
+            messages=_Messages(self.client, chat_id),
+            members=SimpleNamespace(get=lambda: self._members(chat_id))
+        )
+
+    async def post(self, body):
+        await self.client.call('create_chat')
+        return Chat(id=f"19:{len(self.client.feeds)}@thread.v2", topic=body.topic)
+
+    async def _members(self, chat_id):
+        await self.client.call('list_members')
+        return SimpleNamespace(value=list(self.client.feed(chat_id).members))
+
+class _Messages:
+    def __init__(self, client, chat_id, offset=None, since=None, top=50):
+        self.client = client
+        self.chat_id = chat_id
+        self.offset = offset
+        self.since = since
+        self.top = top
+
+    def with_url(self, url):
+        offset, since = url.split('|', 1)
+        return _Messages(self.client, self.chat_id, int(offset), datetime.fromisoformat(since) if since else None, self.top)
+
+    def by_chat_message_id(self, message_id):
+        async def get():
+            await self.client.call('get_message')
+            return self.client.feed(self.chat_id).messages[int(message_id)]
+        return SimpleNamespace(get=get)
+
+    async def get(self, request_configuration=None):
+        await self.client.call('list_messages')
+        feed = self.client.feed(self.chat_id)
+        since, top, offset = self.since, self.top, self.offset or 0
+        if request_configuration is not None:
+            feed.receive()
+            query = request_configuration.query_parameters
+            top = query.top or top
+            match = FILTER_PATTERN.match(query.filter or '')
+            since = datetime.fromisoformat(match.group(1).replace('Z', '+00:00')) if match else None
+
+        # Newest first, as requested by $orderby lastModifiedDateTime desc; the feed is in time order
+        newest_first = reversed(feed.messages)
+        matching = list(newest_first if since is None else
+                        itertools.takewhile(lambda m: m.last_modified_date_time > since, newest_first))
+        page = matching[offset:offset + top]
+        next_link = None
+        if offset + top < len(matching):
+            next_link = f"{offset + top}|{since.isoformat() if since else ''}"
+        self.top = top
+        # A plain page object: wrapping already-built messages in a backed kiota model re-walks all of them
+        return SimpleNamespace(value=page, odata_next_link=next_link)
+
+    async def post(self, body):
+        await self.client.call('send_message')
+        return ChatMessage(id='sent', body=body)
+
+class FakeCompletions:
+    """Stand-in for OpenAI's chat.completions and Anthropic's messages resources"""
+
+    def __init__(self, style, latency=0.0, reply_size=200, chunk_size=20):
+        self.style = style
+        self.latency = latency
+        self.reply_size = reply_size
+        self.chunk_size = chunk_size
+        self.requests = []  # (message count, characters sent) per call
+
+    async def create(self, stream=False, **request):
+        messages = request.get('messages', [])
+        self.requests.append((len(messages), sum(len(m['content']) for m in messages) + len(request.get('system', ''))))
+        reply = payload(self.reply_size, f"reply {len(self.requests)}")
+        if stream:
+            return self._stream(reply)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.style == 'openai':
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+        return SimpleNamespace(content=[SimpleNamespace(text=reply)])
+
+    async def _stream(self, reply):
+        chunks = [reply[i:i + self.chunk_size] for i in range(0, len(reply), self.chunk_size)]
+        for chunk in chunks:
+            if self.latency:
+                await asyncio.sleep(self.latency / len(chunks))
+            if self.style == 'openai':
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))])
+            else:
+                yield SimpleNamespace(type='content_block_delta', delta=SimpleNamespace(type='text_delta', text=chunk))
+
+def install_fake_ai(ai_handler, latency=0.0, reply_size=200):
+    """Swap an AIHandler's provider clients for fakes and return the primary provider's fake completions"""
+    fakes = {}
+    if 'openai' in ai_handler.providers:
+        fakes['openai'] = FakeCompletions('openai', latency, reply_size)
+        ai_handler.async_openai = SimpleNamespace(chat=SimpleNamespace(completions=fakes['openai']))
+    if 'claude' in ai_handler.providers:
+        fakes['claude'] = FakeCompletions('anthropic', latency, reply_size)
+        ai_handler.async_anthropic = SimpleNamespace(messages=fakes['claude'])
+    return fakes[ai_handler.providers[0]]
+
+def benchmark_config(poll_interval=0.0):
+    """A config.yaml equivalent with dummy credentials and limits high enough not to throttle"""
+    unlimited = {'rate': 1000000, 'burst': 1000000}
+    return {
+        'azure': {'tenant_id': 'bench', 'client_id': 'bench', 'client_secret': 'bench', 'owner_id': 'owner'},
+        'ai_services': {
+            'openai': {'api_key': 'bench', 'model': 'fake-gpt', 'max_tokens': 500, 'temperature': 0.7},
+            'anthropic': {'api_key': 'bench', 'model': 'fake-claude', 'max_tokens': 500, 'temperature': 0.7},
+            'cache': {'enabled': False}
+        },
+        'rate_limits': {'graph': unlimited, 'openai': unlimited, 'anthropic': unlimited},
+        'outbound_messages': {'coalesce_window': 0},
+        'monitoring': {'poll_interval': poll_interval, 'roster_refresh_interval': 300}
+    }
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""Offline performance benchmarks against fake Graph and AI backends.
+
+Usage: python -m benchmarks.run_benchmarks [--only monitor websocket history startup] [--output results.json]
+       [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import yaml
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from ai_handler import AIHandler, estimate_tokens
+from teams_chat import TeamsGroupChatCreator, MESSAGES_PROCESSED
+from benchmarks.fakes import FakeGraphServiceClient, benchmark_config, install_fake_ai, payload, quiet_logger
+
+BENCHMARKS = ('monitor', 'websocket', 'history', 'startup')
+
+# mode: (teams_chat_creator arguments, large SDKs the mode is expected to import)
+STARTUP_MODES = {
+    'ai_chat_openai': (['--ai-chat-only', '--ai-service', 'openai'], {'openai'}),
+    'ai_chat_claude': (['--ai-chat-only', '--ai-service', 'claude'], {'anthropic'}),
+    'create_chat': (['--name', 'Benchmark', '--members', 'user@example.com'], {'msgraph', 'azure.identity'}),
+    'create_chat_ai': (['--name', 'Benchmark', '--members', 'user@example.com', '--ai-service', 'openai'],
+                       {'msgraph', 'azure.identity', 'openai'}),
+    'monitor_chats': (['--monitor-chats', 'chat-1'], {'msgraph', 'azure.identity'}),
+    'bulk_create': (['--bulk-create', '{specs}', '--bulk-output', '{output}'], {'msgraph', 'azure.identity'}),
+    'export': (['--export-chat', 'chat-1', '--export-output', '{output}'], {'msgraph', 'azure.identity'}),
+}
+LARGE_SDKS = ('openai', 'anthropic', 'msgraph', 'azure.identity')
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+def latency_summary(samples):
+    """Latency statistics in milliseconds for a list of durations in seconds"""
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p90_ms": round(percentile(samples, 90) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples, default=0.0) * 1000, 3)
+    }
+
+async def bench_monitor(args):
+    """Messages per second and Graph calls per message through TeamsGroupChatCreator.monitor_chat"""
+    logger = quiet_logger()
+    config = benchmark_config()
+    graph_client = FakeGraphServiceClient(
+        latency=args.graph_latency,
+        messages_per_poll=args.messages_per_poll,
+        payload_size=args.payload_size,
+        ai_trigger_ratio=args.ai_trigger_ratio
+    )
+    ai_handler = None
+    completions = None
+    if args.ai_trigger_ratio:
+        ai_handler = AIHandler(config, 'openai', logger)
+        completions = install_fake_ai(ai_handler, args.ai_latency, args.reply_size)
+    creator = TeamsGroupChatCreator(config, ai_handler, logger, graph_client=graph_client)
+
+    processed_before = MESSAGES_PROCESSED.values.get((), 0)
+    started = time.perf_counter()
+    await creator.monitor_chat('19:benchmark@thread.v2', duration_minutes=args.duration / 60)
+    elapsed = time.perf_counter() - started
+    processed = MESSAGES_PROCESSED.values.get((), 0) - processed_before
+
+    return {
+        "duration_s": round(elapsed, 3),
+        "messages_processed": processed,
+        "messages_per_second": round(processed / elapsed, 1),
+        "graph_calls": graph_client.total_calls(),
+        "graph_calls_per_message": round(graph_client.total_calls() / processed, 4) if processed else None,
+        "graph_calls_by_operation": dict(graph_client.calls),
+        "ai_requests": len(completions.requests) if completions else 0
+    }
+
+async def _websocket_client(port, client_id, args):
+    import websockets
+
+    samples, first_chunks = [], []
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws/{client_id}", max_size=None) as websocket:
+        await websocket.send(json.dumps({"command": "init", "service_type": args.service}))
+        while json.loads(await websocket.recv())["type"] != "system":
+            pass
+
+        for index in range(args.messages_per_client):
+            started = time.perf_counter()
+            await websocket.send(json.dumps({
+                "command": "chat",
+                "message": payload(args.payload_size, f"{client_id} question {index}"),
+                "stream": args.stream
+            }))
+            first_chunk = None
+            while True:
+                frame = json.loads(await websocket.recv())
+                if frame["type"] == "ai_chunk" and first_chunk is None:
+                    first_chunk = time.perf_counter() - started
+                if frame["type"] in ("ai", "ai_done", "error"):
+                    break
+            samples.append(time.perf_counter() - started)
+            if first_chunk is not None:
+                first_chunks.append(first_chunk)
+    return samples, first_chunks
+
+async def bench_websocket(args):
+    """Round-trip latency of chat commands through websocket_endpoint with N concurrent clients"""
+    import uvicorn
+
+    # web_app serves ./static and reads ./config.yaml, so run it from a scratch directory
+    workdir = tempfile.mkdtemp(prefix='teams-chat-benchmark-')
+    with open(os.path.join(workdir, 'config.yaml'), 'w') as f:
+        yaml.safe_dump(benchmark_config(), f)
+    os.symlink(os.path.join(REPO_ROOT, 'static'), os.path.join(workdir, 'static'))
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import web_app
+
+        def fake_ai_handler(config, service_type, logger):
+            handler = AIHandler(config, service_type, logger)
+            install_fake_ai(handler, args.ai_latency, args.reply_size)
+            return handler
+        web_app.AIHandler = fake_ai_handler
+
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(web_app.app, host='127.0.0.1', port=port, log_level='warning'))
+        serve_task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            _websocket_client(port, f"benchmark-{i}", args) for i in range(args.clients)
+        ))
+        elapsed = time.perf_counter() - started
+
+        server.should_exit = True
+        await serve_task
+    finally:
+        os.chdir(previous_cwd)
+
+    samples = [sample for client_samples, _ in results for sample in client_samples]
+    first_chunks = [sample for _, client_first_chunks in results for sample in client_first_chunks]
+    result = {
+        "clients": args.clients,
+        "messages_per_client": args.messages_per_client,
+        "stream": args.stream,
+        "duration_s": round(elapsed, 3),
+        "commands_per_second": round(len(samples) / elapsed, 1),
+        "round_trip": latency_summary(samples)
+    }
+    if first_chunks:
+        result["first_chunk"] = latency_summary(first_chunks)
+    return result
+
+async def bench_history(args):
+    """Per-turn overhead and request size as AIHandler's conversation history grows"""
+    logger = quiet_logger()
+    config = benchmark_config()
+    config['ai_services']['history'] = {'max_tokens': args.max_history_tokens}
+    sample_every = max(1, args.turns // 20)
+
+    results = {}
+    for service_type in ('openai', 'claude'):
+        ai_handler = AIHandler(config, service_type, logger)
+        completions = install_fake_ai(ai_handler, 0, args.reply_size)
+        samples, series = [], []
+        for turn in range(1, args.turns + 1):
+            started = time.perf_counter()
+            await ai_handler.get_ai_response_async(payload(args.payload_size, f"question {turn}"))
+            samples.append(time.perf_counter() - started)
+            if turn % sample_every == 0 or turn == args.turns:
+                series.append({
+                    "turn": turn,
+                    "history_messages": len(ai_handler.conversation_history),
+                    "history_tokens": sum(estimate_tokens(m["content"]) for m in ai_handler.conversation_history),
+                    "request_chars": completions.requests[-1][1],
+                    "overhead_ms": round(samples[-1] * 1000, 3)
+                })
+        results[service_type] = {
+            "turns": args.turns,
+            "overhead": latency_summary(samples),
+            "final_history_messages": len(ai_handler.conversation_history),
+            "max_request_chars": max(chars for _, chars in completions.requests),
+            "series": series
+        }
+    return results
+
+def parse_importtime(output):
+    """(total import seconds, names of imported modules) from the stderr of python -X importtime"""
+    total, modules = 0, set()
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        # Nested imports are indented below the module that triggered them and already counted there
+        if len(name) - len(name.lstrip()) == 1:
+            total += int(cumulative_us)
+    return total / 1e6, modules
+
+async def bench_startup(args):
+    """Start-up time of each teams_chat_creator mode with --dry-run, measured with -X importtime"""
+    workdir = tempfile.mkdtemp(prefix='teams-chat-startup-')
+    config_path = os.path.join(workdir, 'config.yaml')
+    with open(config_path, 'w') as f:
+        yaml.safe_dump(benchmark_config(), f)
+    specs_path = os.path.join(workdir, 'specs.jsonl')
+    with open(specs_path, 'w') as f:
+        f.write(json.dumps({"topic": "Benchmark", "members": ["user@example.com"]}) + '\n')
+
+    results = {}
+    for mode, (mode_args, expected) in STARTUP_MODES.items():
+        command = [sys.executable, '-X', 'importtime', os.path.join(REPO_ROOT, 'teams_chat_creator.py'),
+                   '--config', config_path, '--dry-run']
+        command += [a.format(specs=specs_path, output=os.path.join(workdir, 'output.jsonl')) for a in mode_args]
+        wall_times, import_times = [], []
+        for _ in range(args.startup_runs):
+            started = time.perf_counter()
+            process = await asyncio.create_subprocess_exec(
+                *command, cwd=workdir, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            _, stderr = await process.communicate()
+            wall_times.append(time.perf_counter() - started)
+            if process.returncode:
+                raise RuntimeError(f"{mode} dry run failed: {stderr.decode()[-500:]}")
+            import_seconds, modules = parse_importtime(stderr.decode())
+            import_times.append(import_seconds)
+        loaded = {sdk for sdk in LARGE_SDKS if any(m == sdk or m.startswith(sdk + '.') for m in modules)}
+        results[mode] = {
+            "wall_ms": round(percentile(wall_times, 50) * 1000, 1),
+            "import_ms": round(percentile(import_times, 50) * 1000, 1),
+            "modules": len(modules),
+            "large_sdks": sorted(loaded),
+            "unexpected_sdks": sorted(loaded - expected)
+        }
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def flatten(results, prefix=''):
+    """Numeric leaves of a results dict as {'a.b.c': value}, skipping per-turn series"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def print_comparison(baseline, report):
+    old, new = flatten(baseline.get("results", {})), flatten(report["results"])
+    print(f"\nCompared with {baseline.get('git_commit') or 'baseline'} ({baseline.get('generated_at', '?')}):")
+    for name in sorted(set(old) & set(new)):
+        change = f"{(new[name] - old[name]) / old[name] * 100:+.1f}%" if old[name] else "n/a"
+        print(f"  {name}: {old[name]} -> {new[name]} ({change})")
+
+async def run(args):
+    benchmarks = {'monitor': bench_monitor, 'websocket': bench_websocket, 'history': bench_history,
+                  'startup': bench_startup}
+    results = {}
+    for name in args.only:
+        print(f"Running {name} benchmark...")
+        results[name] = await benchmarks[name](args)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Run offline benchmarks against fake Graph and AI backends')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, default=list(BENCHMARKS), help='Benchmarks to run')
+    parser.add_argument('--output', default='benchmark_results.json', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Earlier results file to print relative changes against')
+    parser.add_argument('--graph-latency', type=float, default=0.0, help='Simulated Graph latency per call in seconds')
+    parser.add_argument('--ai-latency', type=float, default=0.0, help='Simulated AI provider latency in seconds')
+    parser.add_argument('--payload-size', type=int, default=200, help='Characters per chat message or prompt')
+    parser.add_argument('--reply-size', type=int, default=200, help='Characters per AI reply')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds to run the monitor loop')
+    parser.add_argument('--messages-per-poll', type=int, default=5, help='New messages the fake chat receives per poll')
+    parser.add_argument('--ai-trigger-ratio', type=float, default=0.0, help='Fraction of messages that start with !hi AI!')
+    parser.add_argument('--clients', type=int, default=50, help='Concurrent WebSocket clients')
+    parser.add_argument('--messages-per-client', type=int, default=20, help='Chat commands each client sends')
+    parser.add_argument('--service', choices=['openai', 'claude', 'auto'], default='openai', help='AI service the clients use')
+    parser.add_argument('--stream', action='store_true', help='Request streamed replies over the WebSocket')
+    parser.add_argument('--turns', type=int, default=200, help='Conversation turns for the history benchmark')
+    parser.add_argument('--max-history-tokens', type=int, default=4000, help='History token budget for AIHandler')
+    parser.add_argument('--startup-runs', type=int, default=5, help='Interpreter launches per mode for the startup benchmark')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec='seconds'),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        "results": asyncio.run(run(args))
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(flatten(report["results"]), indent=2))
+    print(f"Results written to {output}")
+
+    if baseline:
+        print_comparison(baseline, report)
+
+    # A mode importing an SDK it does not use is a start-up regression, so fail e.g. a CI job
+    unexpected = {mode: r["unexpected_sdks"] for mode, r in report["results"].get("startup", {}).items()
+                  if r["unexpected_sdks"]}
+    if unexpected:
+        print(f"\nModes importing SDKs they do not need: {unexpected}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import asyncio
+import html
+import re
+from utils.metrics import registry, ERRORS
+
+COMMANDS_DISPATCHED = registry.counter('teams_chat_commands_total', 'Chat messages dispatched to a command handler', ['command'])
+
+BLOCK_TAGS = frozenset({'p', 'div', 'br', 'li', 'ul', 'ol', 'tr', 'table', 'blockquote', 'pre',
+                        'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr'})
+# Comments, tags and entities in one scan; everything between them is copied as is
+HTML_TOKEN = re.compile(r'<!--.*?-->|<\s*/?\s*([a-zA-Z][a-zA-Z0-9]*)[^>]*>|&#?[a-zA-Z0-9]+;', re.S)
+LINE_BREAKS = re.compile(r'[ \t]*\n[ \t\n]*')
+
+def _replace_token(match):
+    token = match.group(0)
+    if token[0] == '&':
+        return html.unescape(token)
+    tag = match.group(1)
+    return '\n' if tag and tag.lower() in BLOCK_TAGS else ''
+
+def html_to_text(content):
+    """Plain text of a Teams HTML message body: tags dropped, block tags as line breaks, entities decoded"""
+    if not content:
+        return ''
+    if '<' not in content and '&' not in content:
+        return content.strip()
+    text = HTML_TOKEN.sub(_replace_token, content).replace('\xa0', ' ')
+    return LINE_BREAKS.sub('\n', text).strip()
+
+def message_text(message):
+    """Plain text of a Graph chat message; bodies already sent as text are not parsed"""
+    if not message.body or not message.body.content:
+        return ''
+    content_type = message.body.content_type
+    if content_type is not None and getattr(content_type, 'value', content_type) == 'text':
+        return message.body.content.strip()
+    return html_to_text(message.body.content)
+
+class Command:
+    def __init__(self, name, handler):
+        self.name = name
+        self.handler = handler  # async callable(chat_id, message, args)
+
+class CommandRouter:
+    """Chat commands matched by prefix, by a mention of the bot or by regex, run as async handlers.
+
+    Triggers are registered once and compiled on first use: prefixes into dicts keyed by length,
+    mentions into one dict and all regexes into a single alternation. Prefix and mention lookups cost
+    the same however many commands there are; the alternation still grows with the number of patterns,
+    so prefer prefixes for anything that can be one. At most max_concurrent handlers run at once, and
+    dispatch() waits for a free slot, which holds the monitor back instead of piling up work.
+    """
+
+    def __init__(self, logger, max_concurrent=4):
+        self.logger = logger
+        self.max_concurrent = max_concurrent
+        self.commands = []
+        self._prefixes = {}  # lowercased prefix: Command
+        self._mentions = {}  # lowercased mention text: Command
+        self._patterns = []  # (pattern, Command)
+        self._compiled = None
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.tasks = set()
+
+    def register(self, name, handler, prefixes=(), mentions=(), patterns=()):
+        """Route messages to handler(chat_id, message, args).
+
+        args is the text after a matched prefix or mention, or the re.Match of a matched pattern.
+        Named groups must be unique across all registered patterns.
+        """
+        command = Command(name, handler)
+        self.commands.append(command)
+        for prefix in prefixes:
+            self._prefixes[prefix.lower()] = command
+        for mention in mentions:
+            self._mentions[mention.lower()] = command
+        for pattern in patterns:
+            self._patterns.append((pattern, command))
+        self._compiled = None
+        return command
+
+    def _compile(self):
+        by_length = {}
+        for prefix, command in self._prefixes.items():
+            by_length.setdefault(len(prefix), {})[prefix] = command
+        # Longest first, so '!ai help' wins over '!ai'
+        prefixes = sorted(by_length.items(), reverse=True)
+        pattern = None
+        if self._patterns:
+            pattern = re.compile('|'.join(f'(?P<_c{i}>{p})' for i, (p, _) in enumerate(self._patterns)))
+        self._compiled = prefixes, pattern
+
+    def match(self, text, mentions=()):
+        """(Command, args) for the first trigger found in a message's text and mention texts, or None"""
+        if self._compiled is None:
+            self._compile()
+        prefixes, pattern = self._compiled
+
+        head = text[:prefixes[0][0]].lower() if prefixes else ''
+        for length, table in prefixes:
+            command = table.get(head[:length])
+            # A prefix ending in a letter or digit must be followed by a break, so '!ai' ignores '!aim'
+            if command and (len(text) == length or text[length].isspace() or not head[length - 1].isalnum()):
+                return command, text[length:].strip()
+
+        for mention in mentions:
+            command = self._mentions.get(mention.lower())
+            if command:
+                args = text[len(mention):] if text.lower().startswith(mention.lower()) else text
+                return command, args.strip()
+
+        if pattern:
+            found = pattern.search(text)
+            if found:
+                return self._patterns[int(found.lastgroup[2:])][1], found
+        return None
+
+    async def dispatch(self, chat_id, message, text, mentions=()):
+        """Start the handler of the command a message triggers; returns False when it triggers none"""
+        matched = self.match(text, mentions)
+        if matched is None:
+            return False
+        command, args = matched
+        await self._slots.acquire()
+        COMMANDS_DISPATCHED.inc(command=command.name)
+        task = asyncio.create_task(self._run(command, chat_id, message, args))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return True
+
+    async def _run(self, command, chat_id, message, args):
+        try:
+            await command.handler(chat_id, message, args)
+        except Exception as e:
+            ERRORS.inc(component='commands')
+            self.logger.error(f"Command {command.name} failed in chat {chat_id}: {str(e)}")
+        finally:
+            self._slots.release()
+
+    async def drain(self):
+        """Wait for every running handler to finish"""
+        while self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
@@ -0,0 +1,103 @@
+import asyncio
+import csv
+import json
+import os
+from message_store import iso_timestamp
+
+EXPORT_FIELDS = ['chat_id', 'id', 'created', 'modified', 'sender', 'sender_id', 'message_type', 'content_type',
+                 'content', 'reply_to_id']
+
+def message_record(chat_id, message):
+    """Flatten a Graph chat message into one export row"""
+    user = message.from_.user if message.from_ and message.from_.user else None
+    return {
+        'chat_id': chat_id,
+        'id': message.id,
+        'created': iso_timestamp(message.created_date_time),
+        'modified': iso_timestamp(message.last_modified_date_time),
+        'sender': user.display_name if user else None,
+        'sender_id': user.id if user else None,
+        'message_type': message.message_type.value if message.message_type else None,
+        'content_type': message.body.content_type.value if message.body and message.body.content_type else None,
+        'content': message.body.content if message.body else None,
+        'reply_to_id': message.reply_to_id
+    }
+
+class ChatHistoryExporter:
+    """Streams a chat's full message history to JSONL or CSV, one Graph page at a time.
+
+    Only the page being written and the page being prefetched are held in memory. After every
+    page a checkpoint (<output>.checkpoint) records the nextLink and the output size, so an
+    interrupted export can resume exactly where it stopped.
+    """
+
+    def __init__(self, creator, logger):
+        self.creator = creator
+        self.logger = logger
+        self.exported = 0
+
+    async def iter_pages(self, chat_id, next_link=None):
+        """Yield (messages, next_link) per page while the following page is already being fetched"""
+        pending = asyncio.create_task(self.creator.fetch_message_page(chat_id, next_link))
+        try:
+            while pending:
+                page = await pending
+                next_link = page.odata_next_link
+                pending = asyncio.create_task(self.creator.fetch_message_page(chat_id, next_link)) if next_link else None
+                yield page.value or [], next_link
+        finally:
+            if pending:
+                pending.cancel()
+
+    @staticmethod
+    def _write_page(output_file, export_format, rows):
+        if export_format == 'csv':
+            csv.DictWriter(output_file, fieldnames=EXPORT_FIELDS).writerows(rows)
+        else:
+            output_file.writelines(json.dumps(row) + '\n' for row in rows)
+        output_file.flush()
+        os.fsync(output_file.fileno())
+        return output_file.tell()
+
+    @staticmethod
+    def _save_checkpoint(checkpoint_path, checkpoint):
+        # Written to a temporary file and renamed so a crash never leaves a half-written checkpoint
+        temp_path = checkpoint_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, checkpoint_path)
+
+    async def run(self, chat_id, output_path, export_format='jsonl', resume=False):
+        checkpoint_path = output_path + '.checkpoint'
+        next_link, offset = None, 0
+        if resume and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint['chat_id'] != chat_id:
+                raise ValueError(f"{checkpoint_path} belongs to chat {checkpoint['chat_id']}, not {chat_id}")
+            next_link, offset, self.exported = checkpoint['next_link'], checkpoint['offset'], checkpoint['exported']
+            # Anything written after the last checkpoint is dropped and fetched again
+            with open(output_path, 'r+') as f:
+                f.truncate(offset)
+            self.logger.info(f"Resuming export of chat {chat_id} after {self.exported} messages")
+        elif resume:
+            self.logger.info(f"No checkpoint at {checkpoint_path}, starting a new export")
+
+        with open(output_path, 'a' if offset else 'w', newline='', encoding='utf-8') as output_file:
+            if export_format == 'csv' and not offset:
+                csv.DictWriter(output_file, fieldnames=EXPORT_FIELDS).writeheader()
+
+            async for messages, next_link in self.iter_pages(chat_id, next_link):
+                rows = [message_record(chat_id, m) for m in messages]
+                offset = await asyncio.to_thread(self._write_page, output_file, export_format, rows)
+                self.exported += len(rows)
+                if next_link:
+                    self._save_checkpoint(checkpoint_path, {
+                        'chat_id': chat_id, 'next_link': next_link, 'offset': offset, 'exported': self.exported
+                    })
+                self.logger.debug("Exported %s messages from chat %s", self.exported, chat_id)
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.logger.info(f"Export finished: {self.exported} messages from chat {chat_id} written to {output_path}")
+        return self.exported
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import re
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import datetime, timedelta, timezone
+from ai_handler import AIHandler
+from chat_scheduler import ChatMonitorScheduler
+from teams_chat import TeamsGroupChatCreator
+
+# e.g. chats('19:abc@thread.v2')/messages('1700000000000')
+RESOURCE_PATTERN = re.compile(r"chats\('([^']+)'\)/messages\('([^']+)'\)")
+
+class SubscriptionManager:
+    """Keeps one Graph change-notification subscription per chat alive by renewing it before it expires.
+
+    Subscribing is left to run(), which starts once the web server is accepting requests: Graph validates
+    notification_url with a request of its own while it creates a subscription. A chat whose subscribe
+    fails is polled meanwhile and tried again every retry_seconds.
+    """
+
+    def __init__(self, creator, chat_ids, notification_url, client_state, logger, lifetime_minutes=55,
+                 renew_margin_seconds=600, retry_seconds=60):
+        self.creator = creator
+        self.chat_ids = list(chat_ids)
+        self.notification_url = notification_url
+        self.client_state = client_state
+        self.logger = logger
+        self.lifetime = timedelta(minutes=lifetime_minutes)
+        self.renew_margin = timedelta(seconds=renew_margin_seconds)
+        self.retry_interval = timedelta(seconds=retry_seconds)
+        self.subscriptions = {}  # chat_id: (subscription_id, expires_at)
+        self.next_attempts = {}  # chat_id: time of the next subscribe attempt for chats without a subscription
+
+    def is_subscribed(self, chat_id):
+        return chat_id in self.subscriptions
+
+    async def subscribe(self, chat_id):
+        expiration = datetime.now(timezone.utc) + self.lifetime
+        try:
+            subscription = await self.creator.create_message_subscription(
+                chat_id, self.notification_url, self.client_state, expiration
+            )
+        except Exception as e:
+            self.subscriptions.pop(chat_id, None)
+            self.next_attempts[chat_id] = datetime.now(timezone.utc) + self.retry_interval
+            self.logger.error(f"Could not subscribe to chat {chat_id}, polling it until the next attempt: {str(e)}")
+            return False
+
+        self.subscriptions[chat_id] = (subscription.id, subscription.expiration_date_time or expiration)
+        self.logger.debug("Subscribed to chat %s until %s", chat_id, self.subscriptions[chat_id][1])
+        return True
+
+    async def renew(self, chat_id):
+        subscription_id, _ = self.subscriptions[chat_id]
+        expiration = datetime.now(timezone.utc) + self.lifetime
+        try:
+            await self.creator.renew_subscription(subscription_id, expiration)
+            self.subscriptions[chat_id] = (subscription_id, expiration)
+            self.logger.debug("Renewed subscription for chat %s until %s", chat_id, expiration)
+        except Exception as e:
+            # The subscription may already be gone; creating a new one is the only way back
+            self.logger.error(f"Could not renew subscription for chat {chat_id}: {str(e)}")
+            await self.subscribe(chat_id)
+
+    async def run(self, ready=None):
+        """Subscribe to chats without a subscription and renew the others as they come due; runs until cancelled.
+
+        `ready` is awaited first, e.g. until the server can answer Graph's validation request.
+        """
+        if ready:
+            await ready()
+        while True:
+            now = datetime.now(timezone.utc)
+            for chat_id in self.chat_ids:
+                if chat_id not in self.subscriptions and self.next_attempts.get(chat_id, now) <= now:
+                    await self.subscribe(chat_id)
+            due = [chat_id for chat_id, (_, expires_at) in self.subscriptions.items()
+                   if expires_at - self.renew_margin <= now]
+            for chat_id in due:
+                await self.renew(chat_id)
+
+            deadlines = [expires_at - self.renew_margin for _, expires_at in self.subscriptions.values()]
+            deadlines += [self.next_attempts[c] for c in self.chat_ids if c not in self.subscriptions and c in self.next_attempts]
+            next_due = min(deadlines, default=None)
+            delay = (next_due - datetime.now(timezone.utc)).total_seconds() if next_due else 60
+            await asyncio.sleep(min(max(delay, 1), 60))
+
+    async def unsubscribe_all(self):
+        for chat_id, (subscription_id, _) in list(self.subscriptions.items()):
+            try:
+                await self.creator.delete_subscription(subscription_id)
+            except Exception as e:
+                self.logger.error(f"Could not delete subscription for chat {chat_id}: {str(e)}")
+        self.subscriptions.clear()
+
+class ChatIngestionService:
+    """Feeds chat messages from Graph change notifications into TeamsGroupChatCreator.handle_message,
+    with polling kept as the fallback for chats without a live subscription"""
+
+    def __init__(self, config, logger):
+        notifications_config = config.get('notifications', {})
+        self.logger = logger
+
+        ai_service = notifications_config.get('ai_service')
+        ai_handler = AIHandler(config, ai_service, logger) if ai_service else None
+        self.creator = TeamsGroupChatCreator(config, ai_handler, logger)
+
+        self.chat_ids = notifications_config.get('chat_ids', [])
+        self.client_state = notifications_config.get('client_state') or uuid.uuid4().hex
+        self.queue = asyncio.Queue(maxsize=notifications_config.get('queue_size', 1000))
+        self.worker_count = notifications_config.get('workers', 4)
+        self.subscriptions = SubscriptionManager(
+            self.creator,
+            self.chat_ids,
+            notifications_config['notification_url'],
+            self.client_state,
+            logger,
+            lifetime_minutes=notifications_config.get('lifetime_minutes', 55),
+            renew_margin_seconds=notifications_config.get('renew_margin_seconds', 600),
+            retry_seconds=notifications_config.get('subscribe_retry_seconds', 60)
+        )
+        self.scheduler = ChatMonitorScheduler(self.creator, self.chat_ids, logger, push_source=self.subscriptions)
+        self.tasks = []
+
+    def enqueue(self, notification):
+        """Queue one notification from Graph; returns False if Graph should redeliver it later"""
+        if notification.get('clientState') != self.client_state:
+            # Not from our subscription: acknowledge it so it isn't redelivered, but never act on it
+            self.logger.error("Dropping change notification with unexpected clientState")
+            return True
+        try:
+            self.queue.put_nowait(notification)
+            return True
+        except asyncio.QueueFull:
+            self.logger.error("Change notification queue is full")
+            return False
+
+    async def start(self, ready=None):
+        """Start ingestion; chats are subscribed in the background once `ready` returns and polled until then"""
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+        self.tasks.append(asyncio.create_task(self.subscriptions.run(ready)))
+        self.tasks.append(asyncio.create_task(self.scheduler.run(None)))
+        self.logger.info(f"Chat ingestion started for {len(self.chat_ids)} chats")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        await self.creator.close()
+        await self.subscriptions.unsubscribe_all()
+
+    async def _worker(self):
+        while True:
+            notification = await self.queue.get()
+            try:
+                await self.handle_notification(notification)
+            except Exception as e:
+                self.logger.error(f"Error handling change notification: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    async def handle_notification(self, notification):
+        match = RESOURCE_PATTERN.search(notification.get('resource', ''))
+        if not match:
+            self.logger.debug("Ignoring notification for resource %s", notification.get('resource'))
+            return
+
+        chat_id, message_id = match.groups()
+        # Shared with the polling fallback and claimed before the fetch, so a duplicate notification
+        # or a poll running meanwhile skips the message
+        sync_state = self.scheduler.sync_state(chat_id)
+        if not sync_state.reserve(message_id):
+            return
+        try:
+            message = await self.creator.get_chat_message(chat_id, message_id)
+        except Exception:
+            sync_state.release(message_id)
+            raise
+
+        # Only polls move the high-water mark, so an earlier message whose notification was lost
+        # is still fetched by the next fallback poll
+        await self.creator.handle_message(chat_id, message, sync_state, advance=False)
+        await self.creator.store_messages(chat_id, [message], advance=False)
+
+def fake_notification(chat_id, message_id, client_state):
+    """Build a change notification shaped like the ones Graph sends for new chat messages"""
+    return {
+        "value": [{
+            "subscriptionId": "fake-subscription",
+            "clientState": client_state,
+            "changeType": "created",
+            "resource": f"chats('{chat_id}')/messages('{message_id}')",
+            "subscriptionExpirationDateTime": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(),
+            "resourceData": {
+                "id": message_id,
+                "@odata.type": "#Microsoft.Graph.chatMessage",
+                "@odata.id": f"chats('{chat_id}')/messages('{message_id}')"
+            }
+        }]
+    }
+
+def send_fake_notification(url, chat_id, message_id, client_state):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(fake_notification(chat_id, message_id, client_state)).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status
+
+def send_validation_request(url, token='fake-validation-token'):
+    request = urllib.request.Request(f"{url}?validationToken={urllib.parse.quote(token)}", data=b'', method='POST')
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status, response.read().decode('utf-8') == token
+
+def main():
+    parser = argparse.ArgumentParser(description='Send fake Graph change notifications to a local receiver')
+    parser.add_argument('--url', default='http://localhost:8000/notifications', help='Notification endpoint')
+    parser.add_argument('--validate', action='store_true', help='Only run the subscription validation handshake')
+    parser.add_argument('--chat-id', help='Chat ID to put in the notification resource')
+    parser.add_argument('--message-id', default=str(int(datetime.now().timestamp() * 1000)), help='Message ID to notify about')
+    parser.add_argument('--client-state', default='', help='clientState configured under notifications in config.yaml')
+    args = parser.parse_args()
+
+    if args.validate:
+        status, echoed = send_validation_request(args.url)
+        print(f"Validation handshake: HTTP {status}, token echoed: {echoed}")
+    else:
+        if not args.chat_id:
+            parser.error("--chat-id is required unless --validate is given")
+        status = send_fake_notification(args.url, args.chat_id, args.message_id, args.client_state)
+        print(f"Notification sent: HTTP {status}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import asyncio
+import json
+from teams_chat import MAX_BATCH_SIZE
+
+def iter_chat_specs(input_path):
+    """Yield (line_number, spec, error) for each non-blank line of a JSONL file of chat specs"""
+    with open(input_path, 'r') as input_file:
+        for line_number, line in enumerate(input_file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                members = row['members']
+                if isinstance(members, str):
+                    members = [m.strip() for m in members.split(',') if m.strip()]
+                spec = {'topic': row['topic'], 'members': members, 'owner': row.get('owner')}
+                yield line_number, spec, None
+            except (ValueError, KeyError, TypeError) as e:
+                yield line_number, None, f"Invalid chat spec: {str(e)}"
+
+class BulkChatProvisioner:
+    """Streams chat specs from JSONL into Graph $batch requests and writes results to JSONL"""
+
+    def __init__(self, creator, logger, batch_size=MAX_BATCH_SIZE, max_concurrent_batches=4):
+        self.creator = creator
+        self.logger = logger
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.max_concurrent_batches = max_concurrent_batches
+        self.created = 0
+        self.failed = 0
+
+    async def run(self, input_path, output_path):
+        with open(output_path, 'w') as output_file:
+            pending = set()
+            batch = []
+
+            for line_number, spec, error in iter_chat_specs(input_path):
+                if error:
+                    self._write(output_file, {'line': line_number, 'topic': None, 'chat_id': None, 'error': error})
+                    continue
+                batch.append((line_number, spec))
+                if len(batch) == self.batch_size:
+                    pending.add(asyncio.create_task(self._create_batch(batch)))
+                    batch = []
+                # Only a bounded number of batches is read ahead, so memory stays flat for any file size
+                if len(pending) >= self.max_concurrent_batches:
+                    pending = await self._drain(pending, output_file, asyncio.FIRST_COMPLETED)
+
+            if batch:
+                pending.add(asyncio.create_task(self._create_batch(batch)))
+            await self._drain(pending, output_file, asyncio.ALL_COMPLETED)
+
+        self.logger.info(f"Bulk provisioning finished: {self.created} chats created, {self.failed} failed")
+        return self.created, self.failed
+
+    async def _create_batch(self, batch):
+        try:
+            results = await self.creator.create_group_chats_batch([spec for _, spec in batch])
+        except Exception as e:
+            self.logger.error(f"Batch request failed: {str(e)}")
+            results = [(None, f"Batch request failed: {str(e)}")] * len(batch)
+
+        return [
+            {'line': line_number, 'topic': spec['topic'], 'chat_id': chat_id, 'error': error}
+            for (line_number, spec), (chat_id, error) in zip(batch, results)
+        ]
+
+    async def _drain(self, pending, output_file, return_when):
+        if not pending:
+            return pending
+        done, pending = await asyncio.wait(pending, return_when=return_when)
+        for task in done:
+            for row in task.result():
+                self._write(output_file, row)
+        return pending
+
+    def _write(self, output_file, row):
+        if row['chat_id']:
+            self.created += 1
+            self.logger.debug("Created chat %s from line %s", row['chat_id'], row['line'])
+        else:
+            self.failed += 1
+            self.logger.error(f"Line {row['line']}: {row['error']}")
+        output_file.write(json.dumps(row) + '\n')
+        output_file.flush()
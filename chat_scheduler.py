@@ -0,0 +1,88 @@
+import asyncio
+import random
+import time
+from teams_chat import MessageSyncState
+from utils.metrics import ERRORS
+
+class AdaptivePollInterval:
+    """Poll interval that speeds up for busy chats and backs off toward a ceiling for idle ones"""
+
+    def __init__(self, min_interval=2, max_interval=60, backoff_factor=1.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.current = min_interval
+
+    def update(self, new_messages):
+        if new_messages:
+            self.current = self.min_interval
+        else:
+            self.current = min(self.max_interval, self.current * self.backoff_factor)
+        return self.current
+
+class ChatMonitorScheduler:
+    """Monitors many chats on one event loop, sharing a single TeamsGroupChatCreator"""
+
+    def __init__(self, creator, chat_ids, logger, max_concurrent_polls=None, push_source=None):
+        self.creator = creator
+        # Chats that push_source reports as subscribed to change notifications are
+        # only polled at the ceiling interval, as a safety net for missed notifications
+        self.push_source = push_source
+        self.chat_ids = list(dict.fromkeys(chat_ids))
+        self.logger = logger
+
+        monitoring_config = creator.config.get('monitoring', {})
+        self.min_interval = monitoring_config.get('min_poll_interval', 2)
+        self.max_interval = monitoring_config.get('max_poll_interval', 60)
+        self.backoff_factor = monitoring_config.get('poll_backoff_factor', 1.5)
+        max_concurrent_polls = max_concurrent_polls or monitoring_config.get('max_concurrent_polls', 10)
+        self.semaphore = asyncio.Semaphore(max_concurrent_polls)
+
+        self.intervals = {}
+        self.sync_states = {}
+
+    def sync_state(self, chat_id):
+        if chat_id not in self.sync_states:
+            self.sync_states[chat_id] = MessageSyncState(self.creator.max_seen_ids)
+        return self.sync_states[chat_id]
+
+    async def run(self, duration_minutes=10):
+        """Monitor every chat for duration_minutes, or until cancelled when it is None"""
+        end_time = time.time() + (duration_minutes * 60) if duration_minutes is not None else float('inf')
+        self.creator.show_chat_ids = len(self.chat_ids) > 1
+
+        duration = f"for {duration_minutes} minutes" if duration_minutes is not None else "until stopped"
+        self.logger.chat(f"\nMonitoring {len(self.chat_ids)} chats {duration}...")
+        self.logger.chat("----------------------------------------")
+        if self.creator.ai_handler:
+            self.logger.chat(f"AI Integration enabled - Use '{self.creator.ai_prefixes[0]}' to interact with the AI")
+
+        try:
+            await asyncio.gather(*(self._monitor(chat_id, end_time) for chat_id in self.chat_ids))
+        finally:
+            await self.creator.close()
+
+    async def _monitor(self, chat_id, end_time):
+        sync_state = self.sync_state(chat_id)
+        await self.creator.restore_sync_state(chat_id, sync_state)
+        interval = self.intervals[chat_id] = AdaptivePollInterval(
+            self.min_interval, self.max_interval, self.backoff_factor
+        )
+
+        # Spread the first polls out so hundreds of chats don't hit Graph at the same instant
+        await asyncio.sleep(random.uniform(0, self.min_interval))
+
+        while time.time() < end_time:
+            new_messages = 0
+            async with self.semaphore:
+                try:
+                    new_messages = await self.creator.poll_chat(chat_id, sync_state)
+                except Exception as e:
+                    ERRORS.inc(component='monitor')
+                    self.logger.error(f"Error while monitoring chat {chat_id}: {str(e)}")
+
+            delay = interval.update(new_messages)
+            if self.push_source and self.push_source.is_subscribed(chat_id):
+                delay = self.max_interval
+            self.logger.debug("Next poll of chat %s in %.1fs", chat_id, delay)
+            await asyncio.sleep(min(delay, max(0, end_time - time.time())))
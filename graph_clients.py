@@ -0,0 +1,86 @@
+import threading
+import time
+
+class CachedTokenCredential:
+    """Wraps a credential so every client in the process shares one token per scope set,
+    refreshed shortly before it expires instead of on demand by each caller"""
+
+    def __init__(self, credential, refresh_margin=300):
+        self._credential = credential
+        self.refresh_margin = refresh_margin
+        self._tokens = {}  # scopes: AccessToken
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes, claims=None, **kwargs):
+        # Claims challenges (e.g. CAE) need a fresh token and must bypass the cache
+        if claims:
+            return self._credential.get_token(*scopes, claims=claims, **kwargs)
+
+        with self._lock:
+            token = self._tokens.get(scopes)
+            if token is None or token.expires_on - self.refresh_margin <= time.time():
+                token = self._credential.get_token(*scopes, **kwargs)
+                self._tokens[scopes] = token
+            return token
+
+    def close(self):
+        self._credential.close()
+
+_clients = {}  # (tenant_id, client_id): (credential, http_client, graph_client)
+_clients_lock = threading.Lock()
+
+def _create_http_client(graph_config):
+    import httpx
+    from kiota_http.middleware.options import RetryHandlerOption
+    from msgraph_core import GraphClientFactory
+
+    limits = httpx.Limits(
+        max_connections=graph_config.get('max_connections', 100),
+        max_keepalive_connections=graph_config.get('max_keepalive_connections', 20),
+        keepalive_expiry=graph_config.get('keepalive_expiry', 30)
+    )
+    client = httpx.AsyncClient(
+        base_url=graph_config.get('base_url', 'https://graph.microsoft.com/v1.0'),
+        limits=limits,
+        timeout=graph_config.get('timeout', 30)
+    )
+    # Retries are owned by utils.request_scheduler, which also rate-limits, so the
+    # middleware's own retry loop is turned off to avoid retrying twice
+    options = {RetryHandlerOption.get_key(): RetryHandlerOption(max_retries=0, should_retry=False)}
+    return GraphClientFactory.create_with_default_middleware(client=client, options=options)
+
+def get_graph_client(config):
+    """Return the process-wide GraphServiceClient for the configured tenant and app registration"""
+    azure_config = config['azure']
+    graph_config = config.get('graph_api', {})
+    key = (azure_config['tenant_id'], azure_config['client_id'])
+
+    with _clients_lock:
+        if key not in _clients:
+            # The Graph SDK is large, so only processes that talk to Graph import it
+            from azure.identity import ClientSecretCredential
+            from kiota_authentication_azure.azure_identity_authentication_provider import AzureIdentityAuthenticationProvider
+            from msgraph import GraphServiceClient, GraphRequestAdapter
+
+            credential = CachedTokenCredential(
+                ClientSecretCredential(
+                    tenant_id=azure_config['tenant_id'],
+                    client_id=azure_config['client_id'],
+                    client_secret=azure_config['client_secret']
+                ),
+                refresh_margin=graph_config.get('token_refresh_margin', 300)
+            )
+            auth_provider = AzureIdentityAuthenticationProvider(credential, scopes=graph_config.get('scopes', []))
+            http_client = _create_http_client(graph_config)
+            graph_client = GraphServiceClient(request_adapter=GraphRequestAdapter(auth_provider, http_client))
+            _clients[key] = (credential, http_client, graph_client)
+        return _clients[key][2]
+
+async def close_graph_clients():
+    """Close the shared HTTP transports and credentials, e.g. on shutdown"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for credential, http_client, _ in clients:
+        await http_client.aclose()
+        credential.close()
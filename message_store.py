@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime, timezone
+import yaml
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    chat_id TEXT NOT NULL,
+    message_id TEXT NOT NULL,
+    created_at TEXT,
+    modified_at TEXT,
+    sender TEXT,
+    content TEXT,
+    event_type TEXT,
+    UNIQUE (chat_id, message_id)
+);
+CREATE INDEX IF NOT EXISTS messages_chat_created ON messages (chat_id, created_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, sender, content='messages', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content, sender) VALUES (new.id, new.content, new.sender);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content, sender) VALUES ('delete', old.id, old.content, old.sender);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content, sender) VALUES ('delete', old.id, old.content, old.sender);
+    INSERT INTO messages_fts (rowid, content, sender) VALUES (new.id, new.content, new.sender);
+END;
+
+CREATE TABLE IF NOT EXISTS roster_events (
+    id INTEGER PRIMARY KEY,
+    chat_id TEXT NOT NULL,
+    occurred_at TEXT NOT NULL,
+    change TEXT NOT NULL,
+    display_name TEXT,
+    roles TEXT
+);
+CREATE INDEX IF NOT EXISTS roster_events_chat_occurred ON roster_events (chat_id, occurred_at);
+
+CREATE TABLE IF NOT EXISTS chat_sync (
+    chat_id TEXT PRIMARY KEY,
+    high_water_mark TEXT NOT NULL
+);
+"""
+
+def iso_timestamp(value):
+    # One fixed UTC format so timestamps compare correctly as strings inside SQLite
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+def _message_row(chat_id, message):
+    sender = None
+    if message.from_ and message.from_.user:
+        sender = message.from_.user.display_name
+    content = message.body.content if message.body and message.body.content else ''
+    event_type = message.event_detail.odata_type if message.event_detail else None
+    created_at = iso_timestamp(message.created_date_time)
+    return (chat_id, message.id, created_at, iso_timestamp(message.last_modified_date_time) or created_at,
+            sender, content, event_type)
+
+class MessageStore:
+    """Local SQLite copy of monitored chats: messages with a full-text index, roster events and
+    the per-chat high-water mark the monitor resumes from"""
+
+    def __init__(self, path='messages.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def _run(self, work):
+        # One connection serialized by a lock; callers hop onto a thread so the event loop never waits on disk
+        with self._lock:
+            try:
+                result = work(self._db)
+                self._db.commit()
+                return result
+            except Exception:
+                self._db.rollback()
+                raise
+
+    def _save_messages(self, db, chat_id, rows, advance):
+        db.executemany(
+            "INSERT INTO messages (chat_id, message_id, created_at, modified_at, sender, content, event_type) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (chat_id, message_id) DO UPDATE SET "
+            "modified_at = excluded.modified_at, sender = excluded.sender, content = excluded.content, "
+            "event_type = excluded.event_type",
+            rows
+        )
+        high_water_mark = max((row[3] for row in rows if row[3]), default=None)
+        if high_water_mark is None or not advance:
+            return
+        db.execute(
+            "INSERT INTO chat_sync (chat_id, high_water_mark) VALUES (?, ?) ON CONFLICT (chat_id) DO UPDATE SET "
+            "high_water_mark = max(high_water_mark, excluded.high_water_mark)",
+            (chat_id, high_water_mark)
+        )
+
+    async def record_messages(self, chat_id, messages, advance=True):
+        """Insert or update Graph chat messages and, unless advance is False, the chat's high-water mark"""
+        rows = [_message_row(chat_id, m) for m in messages]
+        if rows:
+            await asyncio.to_thread(self._run, lambda db: self._save_messages(db, chat_id, rows, advance))
+
+    async def record_roster_changes(self, chat_id, changes, snapshot=False):
+        """Store (change, display_name, roles) entries; a snapshot records the roster as first seen"""
+        occurred_at = iso_timestamp(datetime.now(timezone.utc))
+        rows = [(chat_id, occurred_at, 'present' if snapshot else change, display_name, ','.join(roles))
+                for change, display_name, roles in changes]
+        if rows:
+            await asyncio.to_thread(self._run, lambda db: db.executemany(
+                "INSERT INTO roster_events (chat_id, occurred_at, change, display_name, roles) VALUES (?, ?, ?, ?, ?)",
+                rows
+            ))
+
+    async def load_position(self, chat_id, overlap_seconds=0):
+        """Return (high_water_mark, message IDs within overlap_seconds of it) for resuming a chat"""
+        def load(db):
+            row = db.execute("SELECT high_water_mark FROM chat_sync WHERE chat_id = ?", (chat_id,)).fetchone()
+            if row is None:
+                return None, []
+            high_water_mark = datetime.fromisoformat(row[0])
+            since = iso_timestamp(datetime.fromtimestamp(high_water_mark.timestamp() - overlap_seconds, timezone.utc))
+            ids = [r[0] for r in db.execute(
+                "SELECT message_id FROM messages WHERE chat_id = ? AND modified_at >= ?", (chat_id, since)
+            )]
+            return high_water_mark, ids
+        return await asyncio.to_thread(self._run, load)
+
+    def search(self, query, chat_id=None, limit=50):
+        """Full-text search (FTS5 syntax: words, "phrases", prefix*, AND/OR/NOT), best matches first"""
+        sql = (
+            "SELECT m.chat_id, m.message_id, m.created_at, m.sender, m.content, "
+            "snippet(messages_fts, 0, '[', ']', '...', 16) AS snippet "
+            "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid WHERE messages_fts MATCH ?"
+        )
+        params = [query]
+        if chat_id:
+            sql += " AND m.chat_id = ?"
+            params.append(chat_id)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        try:
+            return self._run(lambda db: [dict(row) for row in db.execute(sql, params)])
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query '{query}': {str(e)}")
+
+    def replay(self, chat_id, since=None, limit=None):
+        """Messages and roster events of a chat in time order, optionally after `since`"""
+        since = iso_timestamp(since) or ''
+        sql = (
+            "SELECT 'message' AS kind, created_at AS time, sender AS name, content, message_id, NULL AS roles "
+            "FROM messages WHERE chat_id = ? AND created_at > ? "
+            "UNION ALL SELECT 'roster', occurred_at, display_name, change, NULL, roles "
+            "FROM roster_events WHERE chat_id = ? AND occurred_at > ? "
+            "ORDER BY time LIMIT ?"
+        )
+        params = (chat_id, since, chat_id, since, limit if limit else -1)
+        return self._run(lambda db: [dict(row) for row in db.execute(sql, params)])
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_shared_store = None
+
+def get_message_store(config):
+    """Return the process-wide message store, or None unless enabled under message_store in config.yaml"""
+    global _shared_store
+    store_config = config.get('message_store', {})
+    if not store_config.get('enabled', False):
+        return None
+    if _shared_store is None:
+        _shared_store = MessageStore(store_config.get('path', 'messages.db'))
+    return _shared_store
+
+def format_entry(entry):
+    timestamp = datetime.fromisoformat(entry['time']).strftime('%Y-%m-%d %H:%M:%S')
+    if entry['kind'] == 'roster':
+        role_str = ' (Owner)' if 'owner' in (entry['roles'] or '').split(',') else ''
+        return f"[{timestamp}] Member {entry['content']}: {entry['name']}{role_str}"
+    return f"[{timestamp}] {entry['name'] or 'Unknown'}:\n{entry['content']}"
+
+def main():
+    parser = argparse.ArgumentParser(description='Search and replay locally stored Teams chat history')
+    parser.add_argument('--config', required=True, help='Path to the configuration YAML file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    search_parser = subparsers.add_parser('search', help='Full-text search over stored messages')
+    search_parser.add_argument('query', help='Search terms (FTS5 syntax)')
+    search_parser.add_argument('--chat-id', help='Only search this chat')
+    search_parser.add_argument('--limit', type=int, default=20, help='Maximum number of results (default: 20)')
+
+    replay_parser = subparsers.add_parser('replay', help='Print a chat\'s stored history in order')
+    replay_parser.add_argument('chat_id', help='Chat to replay')
+    replay_parser.add_argument('--since', help='Only entries after this ISO timestamp')
+    replay_parser.add_argument('--limit', type=int, help='Maximum number of entries')
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    store = get_message_store(config)
+    if store is None:
+        parser.error("message_store.enabled is not set in the configuration file")
+
+    try:
+        if args.command == 'search':
+            for result in store.search(args.query, args.chat_id, args.limit):
+                timestamp = datetime.fromisoformat(result['created_at']).strftime('%Y-%m-%d %H:%M:%S')
+                print(f"[{timestamp}] ({result['chat_id']}) {result['sender'] or 'Unknown'}: {result['snippet']}")
+        else:
+            for entry in store.replay(args.chat_id, args.since, args.limit):
+                print(format_entry(entry))
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
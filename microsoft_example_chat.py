@@ -3,13 +3,11 @@
 import argparse
 import asyncio
 import yaml
-from azure.identity import DeviceCodeCredential
-from azure.identity import ClientSecretCredential
-from msgraph import GraphServiceClient
 from msgraph.generated.models.chat import Chat
 from msgraph.generated.models.chat_type import ChatType
 from msgraph.generated.models.conversation_member import ConversationMember
 from msgraph.generated.models.aad_user_conversation_member import AadUserConversationMember
+from graph_clients import get_graph_client
  
 def load_config(config_file):
     with open(config_file, 'r') as file:
@@ -47,18 +45,8 @@ def main():
 
     config = load_config(args.config)
 
-    scopes = config['graph_api']['scopes']
-    tenant_id = config['azure']['tenant_id']
-    client_id = config['azure']['client_id']
-    client_secret=config['azure']['client_secret']
-
-    credential = ClientSecretCredential(
-        tenant_id=tenant_id,
-        client_id=client_id,
-        client_secret=client_secret
-    )
-
-    graph_client = GraphServiceClient(credential, scopes)
+    # Shares the process-wide credential, token cache and HTTP connection pool
+    graph_client = get_graph_client(config)
 
     user_upns = args.users.split(',')
 
@@ -0,0 +1,97 @@
+import asyncio
+from collections import deque
+from utils.request_scheduler import throttling_info
+
+class OutboundMessageQueue:
+    """Per-chat outbound message queues drained by background workers.
+
+    Messages queued for the same chat within coalesce_window seconds of each other are
+    combined into one post. Each chat has a single worker, so posts keep their order.
+    """
+
+    def __init__(self, send, logger, coalesce_window=1.0, max_message_chars=20000,
+                 max_retries=3, retry_delay=2.0, max_queue_size=100):
+        self.send = send  # async callable(content, chat_id)
+        self.logger = logger
+        self.coalesce_window = coalesce_window
+        self.max_message_chars = max_message_chars
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_queue_size = max_queue_size
+        self.queues = {}  # chat_id: asyncio.Queue
+        self.workers = {}  # chat_id: asyncio.Task
+        self.failed = deque(maxlen=100)  # (chat_id, content) posts that ran out of retries
+
+    def enqueue(self, chat_id, content):
+        """Queue a message without waiting for it to be posted"""
+        if chat_id not in self.queues:
+            self.queues[chat_id] = asyncio.Queue(maxsize=self.max_queue_size)
+            self.workers[chat_id] = asyncio.create_task(self._drain(chat_id))
+        try:
+            self.queues[chat_id].put_nowait(content)
+        except asyncio.QueueFull:
+            self.logger.error(f"Outbound queue for chat {chat_id} is full, dropping message")
+            self.failed.append((chat_id, content))
+
+    async def _drain(self, chat_id):
+        queue = self.queues[chat_id]
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.coalesce_window
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                for content in self._combine(batch):
+                    await self._send_with_retry(chat_id, content)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _combine(self, batch):
+        """Join queued messages into as few posts as fit under max_message_chars, in order"""
+        combined = []
+        for content in batch:
+            if combined and len(combined[-1]) + len(content) + 2 <= self.max_message_chars:
+                combined[-1] = f"{combined[-1]}\n\n{content}"
+            else:
+                combined.append(content)
+        if len(batch) > len(combined):
+            self.logger.debug("Coalesced %d outbound messages into %d", len(batch), len(combined))
+        return combined
+
+    async def _send_with_retry(self, chat_id, content):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.send(content, chat_id)
+                return
+            except Exception as e:
+                # Throttling and 5xx responses were already retried by the request scheduler and other HTTP
+                # errors (403, 404, ...) will not go away, so only failures without a response are retried here
+                status, _ = throttling_info(e)
+                if status is not None or attempt == self.max_retries:
+                    self.logger.error(f"Giving up on message to chat {chat_id} after {attempt + 1} attempts: {str(e)}")
+                    self.failed.append((chat_id, content))
+                    return
+                delay = self.retry_delay * 2 ** attempt
+                self.logger.debug("Send to chat %s failed (%s), retrying in %.1fs", chat_id, e, delay)
+                await asyncio.sleep(delay)
+
+    def pending(self):
+        return sum(queue.qsize() for queue in self.queues.values())
+
+    async def flush(self):
+        """Wait until every queued message has been posted or given up on"""
+        await asyncio.gather(*(queue.join() for queue in self.queues.values()))
+
+    async def close(self):
+        await self.flush()
+        for worker in self.workers.values():
+            worker.cancel()
+        await asyncio.gather(*self.workers.values(), return_exceptions=True)
+        self.queues.clear()
+        self.workers.clear()
@@ -0,0 +1,44 @@
+import importlib
+import threading
+
+# provider: (SDK module, sync client class, async client class); each SDK is imported on first use
+# since either one takes longer to import than the rest of the application
+PROVIDER_SDKS = {
+    'openai': ('openai', 'OpenAI', 'AsyncOpenAI'),
+    'anthropic': ('anthropic', 'Anthropic', 'AsyncAnthropic'),
+}
+
+_clients = {}  # (provider, api_key, is_async): SDK client
+_clients_lock = threading.Lock()
+
+def _create_client(provider, api_key, is_async):
+    if provider not in PROVIDER_SDKS:
+        raise ValueError(f"Unknown AI provider '{provider}', expected one of {', '.join(PROVIDER_SDKS)}")
+    module_name, sync_class, async_class = PROVIDER_SDKS[provider]
+    client_class = getattr(importlib.import_module(module_name), async_class if is_async else sync_class)
+    if is_async:
+        # Retries on the async path are handled by the shared request scheduler
+        return client_class(api_key=api_key, max_retries=0)
+    return client_class(api_key=api_key)
+
+def get_provider_client(provider, api_key, is_async=True):
+    """Return the process-wide OpenAI or Anthropic SDK client for one API key.
+
+    Every handler using the same credentials shares the client and its connection pool.
+    """
+    key = (provider, api_key, is_async)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = _create_client(provider, api_key, is_async)
+        return _clients[key]
+
+async def close_provider_clients():
+    """Close the shared HTTP connection pools, e.g. on shutdown"""
+    with _clients_lock:
+        clients = list(_clients.items())
+        _clients.clear()
+    for (_, _, is_async), client in clients:
+        if is_async:
+            await client.close()
+        else:
+            client.close()
@@ -1,47 +1,203 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from collections import deque
 import time
+import json
 import asyncio
-from azure.identity import ClientSecretCredential
-from msgraph import GraphServiceClient
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+from msgraph.generated.chats.item.messages.messages_request_builder import MessagesRequestBuilder
 from msgraph.generated.models.chat import Chat
 from msgraph.generated.models.chat_type import ChatType
 from msgraph.generated.models.aad_user_conversation_member import AadUserConversationMember
+from msgraph.generated.models.subscription import Subscription
+from msgraph.generated.models.chat_message import ChatMessage
+from msgraph.generated.models.item_body import ItemBody
+from msgraph_core.requests.batch_request_content import BatchRequestContent
+from msgraph_core.requests.batch_request_item import BatchRequestItem
+from graph_clients import get_graph_client
+from message_store import get_message_store
+from outbound_queue import OutboundMessageQueue
+from chat_commands import CommandRouter, message_text
+from ai_handler import AIResponseError
+from utils.request_scheduler import THROTTLING_STATUS_CODES, get_request_scheduler, retry_after
+from utils.metrics import registry, ERRORS
+
+# Graph accepts at most 20 requests in one JSON $batch
+MAX_BATCH_SIZE = 20
+# POSTs that create something; a 502/504 doesn't tell whether Graph did, so they are not retried on those
+NON_IDEMPOTENT_OPERATIONS = {'create_chat', 'batch_create_chats', 'send_message', 'create_subscription'}
+
+GRAPH_REQUEST_SECONDS = registry.histogram(
+    'teams_chat_graph_request_seconds', 'Graph API call latency, including throttling retries', ['operation'])
+MESSAGES_PROCESSED = registry.counter('teams_chat_messages_processed_total', 'Chat messages handled by the monitor')
+AI_TRIGGERS = registry.counter('teams_chat_ai_triggers_total', 'Chat messages that triggered an AI response')
+
+def message_timestamp(message):
+    """Return the last-modified (or created) time of a Graph chat message as an aware datetime"""
+    value = message.last_modified_date_time or message.created_date_time
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+class MessageSyncState:
+    """High-water mark and bounded set of already processed message IDs for one chat"""
+
+    def __init__(self, max_seen_ids=1000):
+        self.high_water_mark = None
+        self.max_seen_ids = max_seen_ids
+        self._seen_order = deque()
+        self._seen_ids = set()
+
+    def is_new(self, message_id):
+        return message_id not in self._seen_ids
+
+    def _remember(self, message_id):
+        if message_id not in self._seen_ids:
+            self._seen_ids.add(message_id)
+            self._seen_order.append(message_id)
+            if len(self._seen_order) > self.max_seen_ids:
+                self._seen_ids.discard(self._seen_order.popleft())
+
+    def _advance(self, timestamp):
+        if timestamp and (self.high_water_mark is None or timestamp > self.high_water_mark):
+            self.high_water_mark = timestamp
+
+    def mark_seen(self, message, advance=True):
+        self._remember(message.id)
+        if advance:
+            self._advance(message_timestamp(message))
+
+    def reserve(self, message_id):
+        """Claim a message ID before fetching it; False when it was already seen or claimed"""
+        if message_id in self._seen_ids:
+            return False
+        self._remember(message_id)
+        return True
+
+    def release(self, message_id):
+        """Give back a claim whose message could not be fetched"""
+        self._seen_ids.discard(message_id)
+
+    def restore(self, high_water_mark, message_ids):
+        """Resume from a stored position, e.g. the message store after a restart"""
+        for message_id in message_ids:
+            self._remember(message_id)
+        self._advance(high_water_mark)
+
+MEMBERSHIP_EVENT_TYPES = (
+    'membersAddedEventMessageDetail',
+    'membersDeletedEventMessageDetail',
+    'membersJoinedEventMessageDetail',
+    'membersLeftEventMessageDetail',
+    'conversationMemberRoleUpdatedEventMessageDetail',
+)
+
+def is_membership_event(message):
+    odata_type = message.event_detail.odata_type if message.event_detail else None
+    return bool(odata_type) and odata_type.rsplit('.', 1)[-1] in MEMBERSHIP_EVENT_TYPES
+
+class RosterCache:
+    """Last known member list of one chat, refreshed on a slow schedule or after membership events"""
+
+    def __init__(self, refresh_interval=300):
+        self.refresh_interval = refresh_interval
+        self.members = {}  # user id: (display_name, roles)
+        self.last_refresh = None
+        self.stale = True
+
+    def needs_refresh(self):
+        return self.stale or time.monotonic() - self.last_refresh >= self.refresh_interval
+
+    def update(self, members):
+        """Replace the roster and return the (change, display_name, roles) entries that differ"""
+        current = {}
+        for member in members:
+            member_id = getattr(member, 'user_id', None) or member.id
+            current[member_id] = (member.display_name or 'Unknown', tuple(member.roles or []))
+
+        changes = []
+        for member_id, (display_name, roles) in current.items():
+            if member_id not in self.members:
+                changes.append(('joined', display_name, roles))
+            elif self.members[member_id][1] != roles:
+                changes.append(('role changed', display_name, roles))
+        for member_id, (display_name, roles) in self.members.items():
+            if member_id not in current:
+                changes.append(('left', display_name, roles))
+
+        self.members = current
+        self.last_refresh = time.monotonic()
+        self.stale = False
+        return changes
 
 class TeamsGroupChatCreator:
-    def __init__(self, config, ai_handler=None, logger=None):
+    def __init__(self, config, ai_handler=None, logger=None, graph_client=None):
         self.config = config
         self.logger = logger
         
         self.logger.debug("Initializing Teams chat creator")
-        self.credential = ClientSecretCredential(
-            tenant_id=self.config['azure']['tenant_id'],
-            client_id=self.config['azure']['client_id'],
-            client_secret=self.config['azure']['client_secret']
-        )
-        
-        self.logger.debug("Creating Graph client")
-        self.graph_client = GraphServiceClient(
-            self.credential,
-            self.config['graph_api']['scopes']
-        )
+        self.logger.debug("Getting shared Graph client")
+        self.graph_client = graph_client or get_graph_client(self.config)
+        self.scheduler = get_request_scheduler(self.config)
         
         self.ai_handler = ai_handler
+        self.ai_handlers = {}  # chat_id: handler holding that chat's conversation
         self.chat_id = None
 
-    async def create_group_chat(self, chat_name, members):
-        self.logger.debug(f"Creating chat members list with owner: {self.config['azure']['owner_id']}")
+        monitoring_config = self.config.get('monitoring', {})
+        self.page_size = monitoring_config.get('page_size', 50)
+        self.max_seen_ids = monitoring_config.get('max_seen_ids', 1000)
+        self.sync_overlap_seconds = monitoring_config.get('sync_overlap_seconds', 2)
+        self.poll_interval = monitoring_config.get('poll_interval', 5)
+        self.show_chat_ids = False
+        self.roster_refresh_interval = monitoring_config.get('roster_refresh_interval', 300)
+        self.rosters = {}  # chat_id: RosterCache
+        self.message_store = get_message_store(self.config)
+
+        outbound_config = self.config.get('outbound_messages', {})
+        self.outbound = OutboundMessageQueue(
+            self.send_chat_message,
+            self.logger,
+            coalesce_window=outbound_config.get('coalesce_window', 1.0),
+            max_message_chars=outbound_config.get('max_message_chars', 20000),
+            max_retries=outbound_config.get('max_retries', 3),
+            retry_delay=outbound_config.get('retry_delay', 2.0),
+            max_queue_size=outbound_config.get('max_queue_size', 100)
+        )
+
+        commands_config = self.config.get('commands', {})
+        self.ai_prefixes = commands_config.get('ai_prefixes', ['!hi AI!'])
+        self.commands = CommandRouter(self.logger, max_concurrent=commands_config.get('max_concurrent', 4))
+        if self.ai_handler:
+            self.commands.register('ai', self.handle_ai_command, prefixes=self.ai_prefixes,
+                                   mentions=commands_config.get('bot_mentions', []))
+
+    async def _graph_request(self, operation, request_factory):
+        """Send a Graph call through the shared rate limiter, retrying on throttling"""
+        with GRAPH_REQUEST_SECONDS.time(operation=operation):
+            try:
+                return await self.scheduler.run('graph', request_factory,
+                                                idempotent=operation not in NON_IDEMPOTENT_OPERATIONS)
+            except Exception:
+                ERRORS.inc(component='graph')
+                raise
+
+    def _build_chat_request(self, chat_name, members, owner_id=None):
+        owner_id = owner_id or self.config['azure']['owner_id']
+        self.logger.debug("Creating chat members list with owner: %s", owner_id)
         chat_members = [
             AadUserConversationMember(
                 odata_type="#microsoft.graph.aadUserConversationMember",
                 roles=["owner"],
                 additional_data={
-                    "user@odata.bind": f"https://graph.microsoft.com/v1.0/users('{self.config['azure']['owner_id']}')"
+                    "user@odata.bind": f"https://graph.microsoft.com/v1.0/users('{owner_id}')"
                 }
             )
         ]
 
         for member in members:
-            self.logger.debug(f"Adding member to chat: {member}")
+            self.logger.debug("Adding member to chat: %s", member)
             chat_members.append(
                 AadUserConversationMember(
                     odata_type="#microsoft.graph.aadUserConversationMember",
@@ -52,70 +208,296 @@ class TeamsGroupChatCreator:
                 )
             )
 
-        request_body = Chat(
+        return Chat(
             chat_type=ChatType.Group,
             topic=chat_name,
             members=chat_members
         )
 
+    async def create_group_chat(self, chat_name, members):
+        request_body = self._build_chat_request(chat_name, members)
+
         try:
             self.logger.debug("Sending chat creation request")
-            result = await self.graph_client.chats.post(request_body)
+            result = await self._graph_request('create_chat', lambda: self.graph_client.chats.post(request_body))
             self.logger.info(f"Successfully created group chat: {result.id}")
             return result
         except Exception as e:
             self.logger.error(f"Failed to create chat: {str(e)}")
             raise Exception(f"Failed to create chat: {str(e)}")
 
-    async def send_chat_message(self, message_content):
-        if not self.chat_id:
+    async def create_group_chats_batch(self, chat_specs):
+        """Create up to MAX_BATCH_SIZE chats in one Graph $batch request.
+
+        chat_specs is a list of dicts with 'topic', 'members' and an optional 'owner'.
+        Returns one (chat_id, error) tuple per spec, in the same order. Graph throttles items inside
+        a batch on their own, so throttled items are sent again in a smaller batch after their
+        Retry-After, up to the request scheduler's max_retries times.
+        """
+        if len(chat_specs) > MAX_BATCH_SIZE:
+            raise ValueError(f"A batch holds at most {MAX_BATCH_SIZE} chats, got {len(chat_specs)}")
+
+        requests = {}
+        for index, spec in enumerate(chat_specs):
+            request_body = self._build_chat_request(spec['topic'], spec['members'], spec.get('owner'))
+            requests[str(index)] = self.graph_client.chats.to_post_request_information(request_body)
+
+        results = {}
+        pending = list(requests)
+        for attempt in range(self.scheduler.max_retries + 1):
+            batch_content = BatchRequestContent({
+                request_id: BatchRequestItem(request_information=requests[request_id], id=request_id)
+                for request_id in pending
+            })
+            self.logger.debug("Sending batch chat creation request with %d chats", len(pending))
+            batch_response = await self._graph_request(
+                'batch_create_chats', lambda: self.graph_client.batch.post(batch_request_content=batch_content)
+            )
+
+            throttled, delay = [], 0.0
+            for request_id in pending:
+                item = batch_response.get_response_by_id(request_id)
+                if item is None:
+                    results[request_id] = (None, "No response in batch")
+                elif item.status and 200 <= item.status < 300:
+                    chat_id = self._batch_chat_id(batch_response, request_id, item)
+                    results[request_id] = (chat_id, None) if chat_id else (None, f"{item.status}: chat created but its ID could not be read")
+                elif item.status in THROTTLING_STATUS_CODES and attempt < self.scheduler.max_retries:
+                    throttled.append(request_id)
+                    backoff = min(self.scheduler.max_delay, self.scheduler.base_delay * 2 ** attempt)
+                    delay = max(delay, retry_after(item.headers) or backoff)
+                else:
+                    results[request_id] = (None, self._batch_error_message(item))
+
+            if not throttled:
+                break
+            self.logger.debug("%d batch items throttled, sending them again in %.1fs", len(throttled), delay)
+            await asyncio.sleep(delay)
+            pending = throttled
+        return [results[str(index)] for index in range(len(chat_specs))]
+
+    @staticmethod
+    def _batch_chat_id(batch_response, request_id, item):
+        # A body that fails to deserialize must not fail the other items; Graph has already created this chat
+        try:
+            return batch_response.response_body(request_id, Chat).id
+        except Exception:
+            try:
+                return json.loads(item.body.getvalue() if item.body else b'').get('id')
+            except (ValueError, AttributeError):
+                return None
+
+    @staticmethod
+    def _batch_error_message(item):
+        body = item.body.getvalue() if item.body else b''
+        try:
+            error = json.loads(body).get('error', {})
+            return f"{item.status}: {error.get('code', '')} {error.get('message', '')}".strip()
+        except (ValueError, AttributeError):
+            return f"{item.status}: {body.decode('utf-8', 'replace')[:500]}"
+
+    async def send_chat_message(self, message_content, chat_id=None):
+        chat_id = chat_id or self.chat_id
+        if not chat_id:
             raise Exception("Chat ID not set")
             
+        request_body = ChatMessage(body=ItemBody(content=message_content))
+        # Raises the Graph error as is, so the outbound queue can tell HTTP errors from network failures
+        await self._graph_request(
+            'send_message', lambda: self.graph_client.chats.by_chat_id(chat_id).messages.post(request_body)
+        )
+
+    async def fetch_new_messages(self, chat_id, sync_state):
+        """Fetch the messages changed since the sync state's high-water mark, oldest first.
+
+        Messages already seen (the overlap window, or ones a change notification handled) are included,
+        so the poll can move its high-water mark past them.
+        """
+        query_params = MessagesRequestBuilder.MessagesRequestBuilderGetQueryParameters(
+            top=self.page_size,
+            orderby=["lastModifiedDateTime desc"]
+        )
+        if sync_state.high_water_mark:
+            # Overlap the window slightly so messages sharing the boundary timestamp are not lost;
+            # poll_chat skips the duplicates this brings back using the seen-ID set.
+            since = sync_state.high_water_mark - timedelta(seconds=self.sync_overlap_seconds)
+            query_params.filter = f"lastModifiedDateTime gt {since.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')}"
+
+        messages_builder = self.graph_client.chats.by_chat_id(chat_id).messages
+        request_config = RequestConfiguration(query_parameters=query_params)
+        page = await self._graph_request('list_messages', lambda: messages_builder.get(request_configuration=request_config))
+
+        messages = []
+        while page:
+            messages.extend(page.value or [])
+            # The first sync only reads the latest page; later syncs drain every page of the delta
+            if not sync_state.high_water_mark or not page.odata_next_link:
+                break
+            next_page = messages_builder.with_url(page.odata_next_link)
+            page = await self._graph_request('list_messages', next_page.get)
+
+        self.logger.debug("Fetched %d messages for chat %s", len(messages), chat_id)
+        return sorted(messages, key=lambda m: m.created_date_time or message_timestamp(m))
+
+    async def fetch_message_page(self, chat_id, next_link=None):
+        """Fetch one page of a chat's full history, newest first; pass the previous page's nextLink to continue"""
+        messages_builder = self.graph_client.chats.by_chat_id(chat_id).messages
+        if next_link:
+            return await self._graph_request('list_messages', messages_builder.with_url(next_link).get)
+        query_params = MessagesRequestBuilder.MessagesRequestBuilderGetQueryParameters(top=self.page_size)
+        request_config = RequestConfiguration(query_parameters=query_params)
+        return await self._graph_request('list_messages', lambda: messages_builder.get(request_configuration=request_config))
+
+    async def handle_message(self, chat_id, message, sync_state, advance=True, dispatch=True):
+        sync_state.mark_seen(message, advance)
+        MESSAGES_PROCESSED.inc()
+
+        if is_membership_event(message) and chat_id in self.rosters:
+            self.rosters[chat_id].stale = True
+
+        created_time = message.created_date_time or message_timestamp(message)
+        from_user = 'Unknown'
+        if message.from_ and message.from_.user:
+            from_user = message.from_.user.display_name or 'Unknown'
+        text = message_text(message)
+
+        chat_label = f" ({chat_id})" if self.show_chat_ids else ''
+        self.logger.chat(f"\n[{created_time.strftime('%Y-%m-%d %H:%M:%S')}]{chat_label} {from_user}:", color='chat_timestamp')
+        self.logger.chat(f"{text}", color='chat_user')
+
+        if dispatch and self.commands.commands:
+            mentions = [m.mention_text for m in (message.mentions or []) if m.mention_text]
+            await self.commands.dispatch(chat_id, message, text, mentions)
+
+    async def handle_ai_command(self, chat_id, message, prompt):
+        if not prompt:
+            return
+        AI_TRIGGERS.inc()
+        self.logger.chat("\nProcessing AI request...", color='chat_system')
+        try:
+            response, model = await self.chat_ai_handler(chat_id).get_ai_response_async(prompt)
+        except AIResponseError:
+            # Already logged by the handler; error text is never posted into the chat
+            self.logger.chat("\nAI request failed, no reply posted", color='chat_system')
+            return
+        # Posted by the outbound worker so the monitor loop never waits on the send
+        self.outbound.enqueue(chat_id, f"{model}: {response}")
+
+    def chat_ai_handler(self, chat_id):
+        """The AI conversation of one chat, created on first use, so no chat sees another chat's prompts"""
+        if chat_id not in self.ai_handlers:
+            self.ai_handlers[chat_id] = self.ai_handler.new_conversation()
+        return self.ai_handlers[chat_id]
+
+    async def close(self):
+        """Let running commands finish, then flush queued replies"""
+        await self.commands.drain()
+        await self.outbound.close()
+
+    async def get_chat_message(self, chat_id, message_id):
+        return await self._graph_request(
+            'get_message', self.graph_client.chats.by_chat_id(chat_id).messages.by_chat_message_id(message_id).get
+        )
+
+    async def create_message_subscription(self, chat_id, notification_url, client_state, expiration):
+        """Subscribe to change notifications for new messages in a chat"""
+        request_body = Subscription(
+            change_type="created",
+            notification_url=notification_url,
+            resource=f"/chats/{chat_id}/messages",
+            expiration_date_time=expiration,
+            client_state=client_state
+        )
+        return await self._graph_request('create_subscription', lambda: self.graph_client.subscriptions.post(request_body))
+
+    async def renew_subscription(self, subscription_id, expiration):
+        request_body = Subscription(expiration_date_time=expiration)
+        return await self._graph_request(
+            'renew_subscription', lambda: self.graph_client.subscriptions.by_subscription_id(subscription_id).patch(request_body)
+        )
+
+    async def delete_subscription(self, subscription_id):
+        await self._graph_request('delete_subscription', self.graph_client.subscriptions.by_subscription_id(subscription_id).delete)
+
+    async def restore_sync_state(self, chat_id, sync_state):
+        """Continue from the message store's high-water mark instead of re-reading the latest page"""
+        if not self.message_store:
+            return
+        high_water_mark, message_ids = await self.message_store.load_position(chat_id, self.sync_overlap_seconds)
+        if high_water_mark:
+            sync_state.restore(high_water_mark, message_ids)
+            self.logger.debug("Resuming chat %s from stored high-water mark %s", chat_id, high_water_mark.isoformat())
+
+    async def store_messages(self, chat_id, messages, advance=True):
+        if not self.message_store or not messages:
+            return
         try:
-            await self.graph_client.chats.by_chat_id(self.chat_id).messages.post(content=message_content)
+            await self.message_store.record_messages(chat_id, messages, advance)
         except Exception as e:
-            raise Exception(f"Failed to send message: {str(e)}")
+            ERRORS.inc(component='message_store')
+            self.logger.error(f"Failed to store messages for chat {chat_id}: {str(e)}")
+
+    async def poll_chat(self, chat_id, sync_state):
+        """Run one poll cycle for a chat and return the number of new messages handled"""
+        # Without a stored position the first page is existing history: shown and marked seen, but
+        # commands in it were already answered before this monitor started
+        first_sync = sync_state.high_water_mark is None
+        messages = await self.fetch_new_messages(chat_id, sync_state)
+        handled = 0
+        for message in messages:
+            if sync_state.is_new(message.id):
+                await self.handle_message(chat_id, message, sync_state, dispatch=not first_sync)
+                handled += 1
+            else:
+                # Already handled, e.g. pushed by a change notification; the poll still moves past it
+                sync_state.mark_seen(message)
+        await self.store_messages(chat_id, messages)
+        
+        roster = self.rosters.setdefault(chat_id, RosterCache(self.roster_refresh_interval))
+        if roster.needs_refresh():
+            await self.refresh_roster(chat_id, roster)
+
+        return handled
+
+    async def refresh_roster(self, chat_id, roster):
+        """Re-read a chat's members and log only joins, leaves and role changes"""
+        first_load = roster.last_refresh is None
+        members = await self._graph_request('list_members', self.graph_client.chats.by_chat_id(chat_id).members.get)
+        changes = roster.update(members.value or [])
+        self.logger.debug("Refreshed roster for chat %s: %d members, %d changes", chat_id, len(roster.members), len(changes))
+        if self.message_store and changes:
+            try:
+                await self.message_store.record_roster_changes(chat_id, changes, snapshot=first_load)
+            except Exception as e:
+                ERRORS.inc(component='message_store')
+                self.logger.error(f"Failed to store roster changes for chat {chat_id}: {str(e)}")
+
+        chat_label = f" ({chat_id})" if self.show_chat_ids else ''
+        for change, display_name, roles in changes:
+            role_str = ' (Owner)' if 'owner' in roles else ''
+            if first_load:
+                self.logger.chat(f"\nMember{chat_label}: {display_name}{role_str}")
+            else:
+                self.logger.chat(f"\nMember {change}{chat_label}: {display_name}{role_str}", color='chat_system')
 
     async def monitor_chat(self, chat_id, duration_minutes=10):
         self.chat_id = chat_id
         end_time = time.time() + (duration_minutes * 60)
-        last_message_id = None
+        sync_state = MessageSyncState(self.max_seen_ids)
+        await self.restore_sync_state(chat_id, sync_state)
         
         self.logger.chat(f"\nMonitoring chat for {duration_minutes} minutes...")
         self.logger.chat("----------------------------------------")
         if self.ai_handler:
-            self.logger.chat("AI Integration enabled - Use '!hi AI!' to interact with the AI")
+            self.logger.chat(f"AI Integration enabled - Use '{self.ai_prefixes[0]}' to interact with the AI")
 
         while time.time() < end_time:
             try:
-                messages = await self.graph_client.chats.by_chat_id(chat_id).messages.get()
-                
-                for message in reversed(messages.value):
-                    if message.id != last_message_id:
-                        created_time = datetime.fromisoformat(message.created_date_time.replace('Z', '+00:00'))
-                        from_user = message.from_user.display_name if message.from_user else 'Unknown'
-                        content = message.content
-                        
-                        self.logger.chat(f"\n[{created_time.strftime('%Y-%m-%d %H:%M:%S')}] {from_user}:", color='chat_timestamp')
-                        self.logger.chat(f"{content}", color='chat_user')
-                        
-                        if self.ai_handler and content.startswith('!hi AI!'):
-                            prompt = content[8:].strip()
-                            if prompt:
-                                self.logger.chat("\nProcessing AI request...", color='chat_system')
-                                response, model = self.ai_handler.get_ai_response(prompt)
-                                await self.send_chat_message(f"{model}: {response}")
-                        
-                        last_message_id = message.id
-                
-                members = await self.graph_client.chats.by_chat_id(chat_id).members.get()
-                for member in members.value:
-                    display_name = member.display_name or 'Unknown'
-                    roles = member.roles or []
-                    role_str = ' (Owner)' if 'owner' in roles else ''
-                    self.logger.chat(f"\nMember: {display_name}{role_str}")
-
+                await self.poll_chat(chat_id, sync_state)
             except Exception as e:
+                ERRORS.inc(component='monitor')
                 self.logger.error(f"Error while monitoring chat: {str(e)}")
             
-            await asyncio.sleep(5) 
\ No newline at end of file
+            await asyncio.sleep(self.poll_interval)
+
+        await self.close()
@@ -4,71 +4,155 @@ import argparse
 import asyncio
 import yaml
 import sys
-from ai_handler import AIHandler
-from teams_chat import TeamsGroupChatCreator
+from graph_clients import close_graph_clients
+from provider_clients import close_provider_clients
 from utils.logger import setup_logger
 from colorama import Fore, Style
 
+# Each mode imports the modules it needs when it is selected, so e.g. --ai-chat-only never loads
+# the Graph SDK and creating a chat without --ai-service never loads the OpenAI or Anthropic SDK.
+# A mode builds its clients and returns the coroutine doing the actual work.
+
+async def ai_chat_session(ai_handler, service, logger):
+    from ai_handler import AIResponseError
+
+    logger.chat(f"\nStarting AI chat session with {service.upper()}", color='chat_system')
+    logger.chat("Commands:", color='chat_system')
+    logger.chat("  /exit or /bye - End the session", color='chat_system')
+    logger.chat("  /clear - Clear conversation history", color='chat_system')
+    logger.chat("----------------------------------------", color='chat_system')
+    
+    while True:
+        try:
+            # Console output is written on the logger's thread; let it catch up before prompting
+            logger.flush()
+            user_input = input(f"{Fore.GREEN}chat> {Style.RESET_ALL}").strip()
+            if user_input.lower() in ['/exit', '/bye']:
+                logger.chat("\nEnding chat session...", color='chat_system')
+                break
+            elif user_input.lower() == '/clear':
+                ai_handler.clear_conversation()
+                logger.chat("\nConversation history cleared.", color='chat_system')
+            elif user_input:
+                logger.debug("Sending prompt to AI: %s", user_input)
+                try:
+                    response, model = await ai_handler.get_ai_response_async(user_input)
+                    logger.chat(f"\n{model}: {response}\n", color='chat_ai')
+                except AIResponseError as e:
+                    logger.chat(f"\n{str(e)}\n", color='chat_system')
+        except KeyboardInterrupt:
+            logger.chat("\nEnding chat session...", color='chat_system')
+            break
+        except EOFError:
+            break
+
+def ai_chat_mode(args, config, logger):
+    from ai_handler import AIHandler
+
+    if not args.ai_service:
+        raise ValueError("--ai-service must be specified when using --ai-chat-only")
+    logger.debug("Starting AI chat only mode with %s", args.ai_service)
+    logger.debug("Initializing AI handler")
+    ai_handler = AIHandler(config, args.ai_service, logger)
+    return ai_chat_session(ai_handler, args.ai_service, logger)
+
+def bulk_create_mode(args, config, logger):
+    from teams_chat import TeamsGroupChatCreator
+    from chat_provisioning import BulkChatProvisioner
+
+    if not args.bulk_output:
+        raise ValueError("--bulk-output is required when using --bulk-create")
+    creator = TeamsGroupChatCreator(config, None, logger)
+    provisioner = BulkChatProvisioner(creator, logger, max_concurrent_batches=args.batch_concurrency)
+    logger.debug("Provisioning chats from %s into %s", args.bulk_create, args.bulk_output)
+    return provisioner.run(args.bulk_create, args.bulk_output)
+
+def export_mode(args, config, logger):
+    from teams_chat import TeamsGroupChatCreator
+    from chat_export import ChatHistoryExporter
+
+    if not args.export_output:
+        raise ValueError("--export-output is required when using --export-chat")
+    export_format = args.export_format or ('csv' if args.export_output.lower().endswith('.csv') else 'jsonl')
+    creator = TeamsGroupChatCreator(config, None, logger)
+    exporter = ChatHistoryExporter(creator, logger)
+    logger.debug("Exporting chat %s to %s as %s", args.export_chat, args.export_output, export_format)
+    return exporter.run(args.export_chat, args.export_output, export_format, resume=args.resume)
+
+def create_ai_handler(args, config, logger):
+    logger.debug("Initializing Teams chat creator with AI service: %s", args.ai_service)
+    if not args.ai_service:
+        return None
+    from ai_handler import AIHandler
+    return AIHandler(config, args.ai_service, logger)
+
+def monitor_chats_mode(args, config, logger):
+    from teams_chat import TeamsGroupChatCreator
+    from chat_scheduler import ChatMonitorScheduler
+
+    creator = TeamsGroupChatCreator(config, create_ai_handler(args, config, logger), logger)
+    chat_ids = [c.strip() for c in args.monitor_chats.split(',') if c.strip()]
+    logger.debug("Monitoring chats: %s", chat_ids)
+    scheduler = ChatMonitorScheduler(creator, chat_ids, logger, args.max_concurrent_polls)
+    return scheduler.run(args.monitor_time)
+
+async def create_and_monitor_chat(creator, name, members, monitor_time):
+    chat_data = await creator.create_group_chat(name, members)
+    await creator.monitor_chat(chat_data.id, monitor_time)
+
+def create_chat_mode(args, config, logger):
+    from teams_chat import TeamsGroupChatCreator
+
+    if not args.name or not args.members:
+        raise ValueError("--name and --members are required when not using --ai-chat-only or --monitor-chats")
+    creator = TeamsGroupChatCreator(config, create_ai_handler(args, config, logger), logger)
+    members = [m.strip() for m in args.members.split(',')]
+    logger.debug("Creating chat '%s' with members: %s", args.name, members)
+    return create_and_monitor_chat(creator, args.name, members, args.monitor_time)
+
+MODES = {
+    'ai_chat': ai_chat_mode,
+    'bulk_create': bulk_create_mode,
+    'export': export_mode,
+    'monitor_chats': monitor_chats_mode,
+    'create_chat': create_chat_mode,
+}
+
+def select_mode(args):
+    if args.ai_chat_only:
+        return 'ai_chat'
+    if args.bulk_create:
+        return 'bulk_create'
+    if args.export_chat:
+        return 'export'
+    if args.monitor_chats:
+        return 'monitor_chats'
+    return 'create_chat'
+
 async def async_main(args):
     # Setup logger
-    logger = setup_logger(args.debug)
+    logger = setup_logger(args.debug, json_logs=args.log_json, log_file=args.log_file)
     
     try:
-        if args.ai_chat_only:
-            if not args.ai_service:
-                raise ValueError("--ai-service must be specified when using --ai-chat-only")
-            
-            logger.debug(f"Starting AI chat only mode with {args.ai_service}")
-            with open(args.config, 'r') as config_file:
-                config = yaml.safe_load(config_file)
-            
-            logger.debug("Initializing AI handler")
-            ai_handler = AIHandler(config, args.ai_service, logger)
-            logger.chat(f"\nStarting AI chat session with {args.ai_service.upper()}", color='chat_system')
-            logger.chat("Commands:", color='chat_system')
-            logger.chat("  /exit or /bye - End the session", color='chat_system')
-            logger.chat("  /clear - Clear conversation history", color='chat_system')
-            logger.chat("----------------------------------------", color='chat_system')
-            
-            while True:
-                try:
-                    user_input = input(f"{Fore.GREEN}chat> {Style.RESET_ALL}").strip()
-                    if user_input.lower() in ['/exit', '/bye']:
-                        logger.chat("\nEnding chat session...", color='chat_system')
-                        break
-                    elif user_input.lower() == '/clear':
-                        ai_handler.clear_conversation()
-                        logger.chat("\nConversation history cleared.", color='chat_system')
-                    elif user_input:
-                        logger.debug(f"Sending prompt to AI: {user_input}")
-                        response, model = ai_handler.get_ai_response(user_input)
-                        logger.chat(f"\n{model}: {response}\n", color='chat_ai')
-                except KeyboardInterrupt:
-                    logger.chat("\nEnding chat session...", color='chat_system')
-                    break
-                except EOFError:
-                    break
-        else:
-            if not args.name or not args.members:
-                raise ValueError("--name and --members are required when not using --ai-chat-only")
-            
-            logger.debug("Loading configuration file")
-            with open(args.config, 'r') as config_file:
-                config = yaml.safe_load(config_file)
-            
-            logger.debug(f"Initializing Teams chat creator with AI service: {args.ai_service}")
-            ai_handler = AIHandler(config, args.ai_service, logger) if args.ai_service else None
-            creator = TeamsGroupChatCreator(config, ai_handler, logger)
-            
-            members = [m.strip() for m in args.members.split(',')]
-            logger.debug(f"Creating chat '{args.name}' with members: {members}")
-            
-            chat_data = await creator.create_group_chat(args.name, members)
-            await creator.monitor_chat(chat_data.id, args.monitor_time)
+        logger.debug("Loading configuration file")
+        with open(args.config, 'r') as config_file:
+            config = yaml.safe_load(config_file)
+
+        mode = select_mode(args)
+        work = MODES[mode](args, config, logger)
+        if args.dry_run:
+            # Everything is imported and constructed, but no service has been called yet
+            work.close()
+            logger.info(f"Dry run: {mode} mode is ready to start")
+            return
+        await work
         
     except Exception as e:
         logger.error(f"Error: {str(e)}")
         sys.exit(1)
+    finally:
+        await close_graph_clients()
+        await close_provider_clients()
 
 def main():
     parser = argparse.ArgumentParser(description='Create MS Teams group chat and invite members')
@@ -76,9 +160,21 @@ def main():
     parser.add_argument('--name', help='Name of the group chat')
     parser.add_argument('--members', help='Comma-separated list of member IDs')
     parser.add_argument('--monitor-time', type=int, default=10, help='Time in minutes to monitor the chat (default: 10)')
-    parser.add_argument('--ai-service', choices=['openai', 'claude'], help='Enable AI integration with specified service')
+    parser.add_argument('--monitor-chats', help='Comma-separated list of existing chat IDs to monitor concurrently')
+    parser.add_argument('--max-concurrent-polls', type=int, help='Maximum number of chats polled at the same time (default: from config, 10)')
+    parser.add_argument('--bulk-create', help='JSONL file of chat specs ({"topic": ..., "members": [...], "owner": ...}) to create in Graph $batch requests')
+    parser.add_argument('--bulk-output', help='JSONL file receiving the created chat ID or error for each spec')
+    parser.add_argument('--batch-concurrency', type=int, default=4, help='Number of $batch requests in flight at once (default: 4)')
+    parser.add_argument('--export-chat', help='Chat ID whose full message history to export')
+    parser.add_argument('--export-output', help='JSONL or CSV file receiving the exported messages')
+    parser.add_argument('--export-format', choices=['jsonl', 'csv'], help='Export format (default: from the output file extension)')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted export from its checkpoint')
+    parser.add_argument('--ai-service', choices=['openai', 'claude', 'auto'], help='Enable AI integration with specified service (auto: fastest of ai_services.routing.providers)')
     parser.add_argument('--ai-chat-only', action='store_true', help='Start an AI chat session without Teams integration')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    parser.add_argument('--log-json', action='store_true', help='Write logs as JSON lines')
+    parser.add_argument('--log-file', help='Log file (size-rotated); defaults to debug_<timestamp>.log with --debug')
+    parser.add_argument('--dry-run', action='store_true', help='Load the configuration and build the selected mode\'s clients, then exit without calling any service')
 
     args = parser.parse_args()
     asyncio.run(async_main(args))
@@ -0,0 +1,89 @@
+import logging
+import os
+import threading
+import time
+import yaml
+
+class ConfigService:
+    """config.yaml parsed once and re-parsed only when the file changes on disk.
+
+    get() compares the file's mtime and size at most every check_interval seconds. A reload
+    replaces the whole dict at once, so callers never see a half-updated config, and a file
+    that fails to parse leaves the previous config in place. Objects built from the config
+    once can follow reloads with add_listener().
+    """
+
+    def __init__(self, path='config.yaml', check_interval=1.0, logger=None):
+        self.path = path
+        self.check_interval = check_interval
+        self.logger = logger or logging.getLogger('teams_chat')
+        self.version = 0
+        self._config = {}
+        self._signature = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.reload()
+
+    def add_listener(self, callback):
+        """Call callback(config) after every reload that replaced the config"""
+        self._listeners.append(callback)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def reload(self):
+        """Re-read the file if it changed since the last load; returns True when the config was replaced"""
+        if not self._reload():
+            return False
+        for callback in self._listeners:
+            try:
+                callback(self._config)
+            except Exception as e:
+                self.logger.error(f"Error applying reloaded configuration: {str(e)}")
+        return True
+
+    def _reload(self):
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            signature = self._stat()
+            if signature == self._signature:
+                return False
+            if signature is None and self._signature is not None:
+                # A file that disappears mid-run (e.g. while an editor replaces it) keeps the last good config
+                return False
+            try:
+                config = {}
+                if signature is not None:
+                    with open(self.path) as f:
+                        config = yaml.safe_load(f) or {}
+            except (OSError, yaml.YAMLError) as e:
+                self.logger.error(f"Keeping previous configuration, could not load {self.path}: {str(e)}")
+                return False
+            self._config = config
+            self._signature = signature
+            self.version += 1
+            if self.version > 1:
+                self.logger.info(f"Reloaded configuration from {self.path}")
+            return True
+
+    def get(self):
+        """The current config dict; treat it as read-only, it is shared by every caller"""
+        if time.monotonic() >= self._next_check:
+            self.reload()
+        return self._config
+
+_services = {}  # absolute path: ConfigService
+_services_lock = threading.Lock()
+
+def get_config_service(path='config.yaml'):
+    """Return the process-wide ConfigService for a config file"""
+    key = os.path.abspath(path)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = ConfigService(key)
+        return _services[key]
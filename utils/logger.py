@@ -1,11 +1,26 @@
+import atexit
+import json
 import logging
+import queue
 import sys
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from colorama import init, Fore, Style
 
 # Initialize colorama
 init()
 
+# Background thread that performs all handler I/O for the 'teams_chat' logger
+_listener = None
+
+def _stop_listener():
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+atexit.register(_stop_listener)
+
 class ColoredFormatter(logging.Formatter):
     COLORS = {
         'chat_timestamp': Fore.CYAN,
@@ -17,60 +32,100 @@ class ColoredFormatter(logging.Formatter):
 
     def format(self, record):
         # Preserve newlines in chat messages but handle other logs
-        if hasattr(record, 'is_chat') and record.is_chat:
+        if getattr(record, 'is_chat', False):
             if hasattr(record, 'color'):
-                return f"{self.COLORS.get(record.color, '')}{str(record.msg)}{Style.RESET_ALL}"
-            return str(record.msg)
-        if record.msg:
-            record.msg = str(record.msg).replace('\n', '\\n')
-        return super().format(record)
+                return f"{self.COLORS.get(record.color, '')}{record.getMessage()}{Style.RESET_ALL}"
+            return record.getMessage()
+        return super().format(record).replace('\n', '\\n')
 
 class DebugFormatter(logging.Formatter):
+    def formatMessage(self, record):
+        # Tag chat output so it stands out among the debug lines
+        if getattr(record, 'is_chat', False):
+            prefix = 'ERROR: ' if record.levelno >= logging.ERROR else 'CHAT: '
+            record.message = prefix + record.message
+        return super().formatMessage(record)
+
     def format(self, record):
         # Always escape newlines in debug logs
-        if record.msg:
-            record.msg = str(record.msg).replace('\n', '\\n')
-        return super().format(record)
+        return super().format(record).replace('\n', '\\n')
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if getattr(record, 'is_chat', False):
+            entry["chat"] = True
+            entry["color"] = getattr(record, 'color', None)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+class LazyQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # The stock QueueHandler formats the message on the calling thread; leave msg % args
+        # for the listener so the event loop only pays for enqueueing the record
+        record = logging.makeLogRecord(record.__dict__)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+def setup_logger(debug=False, json_logs=False, log_file=None, max_bytes=10 * 1024 * 1024, backup_count=5):
+    global _listener
 
-def setup_logger(debug=False):
     # Create logger
     logger = logging.getLogger('teams_chat')
     logger.setLevel(logging.DEBUG if debug else logging.INFO)
-    
+
     # Remove existing handlers to avoid duplicates
     logger.handlers = []
-    
+    _stop_listener()
+
     # Create console handler with colored formatter
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    console_format = ColoredFormatter('%(message)s')
+    console_format = JsonLinesFormatter() if json_logs else ColoredFormatter('%(message)s')
     console_handler.setFormatter(console_format)
-    logger.addHandler(console_handler)
-    
+    handlers = [console_handler]
+
+    if debug or log_file:
+        # Create size-rotated debug file handler with escaped newlines
+        if not log_file:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            log_file = f'debug_{timestamp}.log'
+        file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+        file_handler.setLevel(logging.DEBUG)
+        file_format = JsonLinesFormatter() if json_logs else DebugFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        file_handler.setFormatter(file_format)
+        handlers.append(file_handler)
+
+    # Handler I/O happens on the listener's thread; callers only enqueue records
+    log_queue = queue.Queue()
+    logger.addHandler(LazyQueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
     if debug:
-        # Create debug file handler with escaped newlines
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        debug_handler = logging.FileHandler(f'debug_{timestamp}.log')
-        debug_handler.setLevel(logging.DEBUG)
-        debug_format = DebugFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        debug_handler.setFormatter(debug_format)
-        logger.addHandler(debug_handler)
-        
         logger.debug("Debug logging enabled")
-    
+
     # Add chat logging methods
     def chat_log(self, msg, color='chat_user'):
         extra = {'is_chat': True, 'color': color}
         self.info(msg, extra=extra)
-        if debug:
-            self.debug(f"CHAT: {msg}")
-    
+
     def error_log(self, msg):
         extra = {'is_chat': True, 'color': 'error'}
         self.error(msg, extra=extra)
-        if debug:
-            self.debug(f"ERROR: {msg}")
-    
+
+    def flush(self):
+        """Block until every queued record has been written, e.g. before prompting for input"""
+        log_queue.join()
+
     logger.chat = chat_log.__get__(logger)
     logger.error_colored = error_log.__get__(logger)
-    return logger
\ No newline at end of file
+    logger.flush = flush.__get__(logger)
+    return logger
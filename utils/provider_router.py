@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from utils.metrics import registry
+
+AI_HEDGED_REQUESTS = registry.counter(
+    'teams_chat_ai_hedged_requests_total', 'Duplicate requests sent because the primary provider was slow', ['provider'])
+AI_FAILOVERS = registry.counter(
+    'teams_chat_ai_failovers_total', 'Requests moved to another provider after an error', ['provider'])
+AI_ROUTED_WINS = registry.counter(
+    'teams_chat_ai_routed_wins_total', 'Routed requests answered by each provider', ['provider', 'mode'])
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+class ProviderRouter:
+    """Runs one request against several providers: the primary first, a hedged duplicate on the next
+    provider once the primary is slower than its usual latency percentile, and the next provider
+    straight away when one fails. The first answer wins and the others are cancelled.
+
+    Latencies are tracked per (provider, mode). The provider with the lowest recent median goes
+    first; one without samples is tried first so its latency gets measured, and one that just
+    failed moves to the back for failure_cooldown seconds.
+    """
+
+    MIN_SAMPLES = 5  # Below this the hedge waits max_hedge_delay
+
+    def __init__(self, providers, hedge_percentile=95, min_hedge_delay=1.0, max_hedge_delay=15.0,
+                 latency_window=50, failure_cooldown=30.0, logger=None):
+        self.providers = list(providers)
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.latency_window = latency_window
+        self.failure_cooldown = failure_cooldown
+        self.logger = logger or logging.getLogger('teams_chat')
+        self.latencies = {}  # (provider, mode): deque of recent seconds
+        self.failed_until = {}  # provider: monotonic time its cooldown ends
+
+    def configure(self, providers, hedge_percentile=95, min_hedge_delay=1.0, max_hedge_delay=15.0,
+                  latency_window=50, failure_cooldown=30.0):
+        """Apply new settings in place, e.g. after a config reload, keeping the latency samples"""
+        # A new list, so handlers holding the old one keep the providers they have clients for
+        self.providers = list(providers)
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.failure_cooldown = failure_cooldown
+        if latency_window != self.latency_window:
+            self.latency_window = latency_window
+            self.latencies = {key: deque(samples, maxlen=latency_window) for key, samples in self.latencies.items()}
+
+    def _samples(self, provider, mode):
+        return self.latencies.setdefault((provider, mode), deque(maxlen=self.latency_window))
+
+    def record(self, provider, mode, seconds):
+        self._samples(provider, mode).append(seconds)
+
+    def record_failure(self, provider):
+        self.failed_until[provider] = time.monotonic() + self.failure_cooldown
+
+    def order(self, mode='complete'):
+        """Providers in the order they should be tried for the next request"""
+        now = time.monotonic()
+
+        def rank(provider):
+            samples = self._samples(provider, mode)
+            median = percentile(samples, 50) if samples else 0.0
+            return self.failed_until.get(provider, 0.0) > now, median, self.providers.index(provider)
+        return sorted(self.providers, key=rank)
+
+    def hedge_delay(self, provider, mode='complete'):
+        """Seconds to wait for `provider` before sending the same request to the next one"""
+        samples = self._samples(provider, mode)
+        if len(samples) < self.MIN_SAMPLES:
+            return self.max_hedge_delay
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, percentile(samples, self.hedge_percentile)))
+
+    async def run(self, factories, mode='complete', discard=None):
+        """Await factories[provider]() across providers and return (provider, result) of the first success.
+
+        `discard` is awaited with any other successful result that finished in the same instant,
+        e.g. to close a second stream nobody is going to read.
+        """
+        order = [p for p in self.order(mode) if p in factories]
+        # Providers a config reload dropped from the routing list, still used by handlers created before it
+        order += [p for p in factories if p not in order]
+        pending = {}  # task: (provider, started)
+        errors = []
+        next_index = 0
+        hedge_at = math.inf
+        winner_started = None
+
+        def launch():
+            nonlocal next_index, hedge_at
+            provider = order[next_index]
+            next_index += 1
+            pending[asyncio.create_task(factories[provider]())] = (provider, time.monotonic())
+            hedge_at = time.monotonic() + self.hedge_delay(provider, mode)
+
+        launch()
+        try:
+            while pending:
+                timeout = max(0.0, hedge_at - time.monotonic()) if next_index < len(order) else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    AI_HEDGED_REQUESTS.inc(provider=order[next_index])
+                    self.logger.debug("No %s answer after %.2fs, hedging with %s", mode, timeout, order[next_index])
+                    launch()
+                    continue
+
+                winner = None
+                for task in done:
+                    provider, started = pending.pop(task)
+                    if task.exception() is not None:
+                        self.record_failure(provider)
+                        errors.append(task.exception())
+                        self.logger.warning(f"{provider} request failed: {str(task.exception())}")
+                        continue
+                    self.record(provider, mode, time.monotonic() - started)
+                    if winner is None:
+                        winner = provider, task.result()
+                        winner_started = started
+                    elif discard:
+                        await discard(task.result())
+                if winner:
+                    AI_ROUTED_WINS.inc(provider=winner[0], mode=mode)
+                    return winner
+                if next_index < len(order) and not pending:
+                    AI_FAILOVERS.inc(provider=order[next_index])
+                    launch()
+            raise errors[-1]
+        finally:
+            for task, (provider, started) in pending.items():
+                # A loser launched before the winner was at least this slow, which keeps it from staying
+                # primary. One launched after it says nothing about its latency and is not recorded.
+                if winner_started is not None and started < winner_started:
+                    self.record(provider, mode, time.monotonic() - started)
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self):
+        return {
+            f"{provider}/{mode}": {
+                "samples": len(samples),
+                "p50": round(percentile(samples, 50), 3) if samples else None,
+                "hedge_delay": round(self.hedge_delay(provider, mode), 3)
+            }
+            for (provider, mode), samples in sorted(self.latencies.items())
+        }
+
+_shared_router = None
+_shared_settings = None
+
+def get_provider_router(config):
+    """Return the process-wide router configured from ai_services.routing in config.yaml.
+
+    A changed routing section (e.g. after a config reload) is applied to the existing router.
+    """
+    global _shared_router, _shared_settings
+    routing = config.get('ai_services', {}).get('routing', {})
+    settings = dict(
+        providers=routing.get('providers', ['openai', 'claude']),
+        hedge_percentile=routing.get('hedge_percentile', 95),
+        min_hedge_delay=routing.get('min_hedge_delay', 1.0),
+        max_hedge_delay=routing.get('max_hedge_delay', 15.0),
+        latency_window=routing.get('latency_window', 50),
+        failure_cooldown=routing.get('failure_cooldown', 30.0)
+    )
+    if _shared_router is None:
+        _shared_router = ProviderRouter(**settings)
+    elif settings != _shared_settings:
+        _shared_router.configure(**settings)
+    _shared_settings = settings
+    return _shared_router
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+# Responses that mean the request was turned away unprocessed, so even a POST can be sent again
+THROTTLING_STATUS_CODES = {429, 503}
+
+def _header(headers, name):
+    if not headers:
+        return None
+    for key, value in dict(headers).items():
+        if key.lower() == name:
+            # Kiota hands back header values as sets/lists
+            if isinstance(value, (set, list, tuple)):
+                value = next(iter(value), None)
+            return value
+    return None
+
+def _parse_retry_after(value):
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_after(headers):
+    """Seconds to wait from a Retry-After header (delay or HTTP date), or None without one"""
+    return _parse_retry_after(_header(headers, 'retry-after'))
+
+def throttling_info(error):
+    """Return (status_code, retry_after_seconds) from a Graph (kiota) or OpenAI/Anthropic SDK error"""
+    response = getattr(error, 'response', None)
+    status = getattr(error, 'response_status_code', None) or getattr(error, 'status_code', None)
+    if status is None and response is not None:
+        status = getattr(response, 'status_code', None)
+
+    headers = getattr(error, 'response_headers', None)
+    if headers is None and response is not None:
+        headers = getattr(response, 'headers', None)
+    return status, retry_after(headers)
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `burst` requests"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def pause(self, seconds):
+        """Hold back every caller of this bucket, e.g. after the server sent Retry-After"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class RequestScheduler:
+    """Rate-limits outbound calls per endpoint and retries throttled ones with jittered backoff"""
+
+    def __init__(self, limits=None, max_retries=4, base_delay=1.0, max_delay=60.0, logger=None):
+        self.limits = limits or {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.logger = logger or logging.getLogger('teams_chat')
+        self.buckets = {}
+        self.waiting = {}  # endpoint: requests queued for a token or a retry
+        self.in_flight = {}  # endpoint: requests currently on the wire
+        self.retries = {}
+        self.throttled = {}
+
+    def configure(self, limits=None, max_retries=4, base_delay=1.0, max_delay=60.0):
+        """Apply new limits in place, e.g. after a config reload; queued requests keep their place"""
+        self.limits = limits or {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        for endpoint, bucket in self.buckets.items():
+            limit = self.limits.get(endpoint, {})
+            bucket.rate = limit.get('rate', 10)
+            bucket.burst = limit.get('burst', 20)
+            bucket.tokens = min(bucket.tokens, bucket.burst)
+
+    def bucket(self, endpoint):
+        if endpoint not in self.buckets:
+            limit = self.limits.get(endpoint, {})
+            self.buckets[endpoint] = TokenBucket(limit.get('rate', 10), limit.get('burst', 20))
+        return self.buckets[endpoint]
+
+    def _count(self, counters, endpoint, delta):
+        counters[endpoint] = counters.get(endpoint, 0) + delta
+
+    async def run(self, endpoint, request_factory, idempotent=True):
+        """Await request_factory() under the endpoint's rate limit, retrying 429/5xx throttling.
+
+        A request that is not idempotent (e.g. a POST creating something) is retried only on 429/503:
+        after a 502 or 504 the server may already have processed it.
+        """
+        retryable = RETRYABLE_STATUS_CODES if idempotent else THROTTLING_STATUS_CODES
+        bucket = self.bucket(endpoint)
+        attempt = 0
+        while True:
+            self._count(self.waiting, endpoint, 1)
+            try:
+                await bucket.acquire()
+            finally:
+                self._count(self.waiting, endpoint, -1)
+
+            self._count(self.in_flight, endpoint, 1)
+            try:
+                return await request_factory()
+            except Exception as e:
+                status, retry_after = throttling_info(e)
+                if status not in retryable or attempt >= self.max_retries:
+                    raise
+                if status == 429:
+                    self._count(self.throttled, endpoint, 1)
+                if retry_after is not None:
+                    bucket.pause(retry_after)
+                    delay = retry_after
+                else:
+                    # Full jitter keeps retries from many callers from arriving in lockstep
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                self._count(self.retries, endpoint, 1)
+                self.logger.debug("%s returned %s, retry %s/%s in %.1fs", endpoint, status, attempt, self.max_retries, delay)
+            finally:
+                self._count(self.in_flight, endpoint, -1)
+
+            self._count(self.waiting, endpoint, 1)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self._count(self.waiting, endpoint, -1)
+
+    def queue_depth(self, endpoint=None):
+        if endpoint is not None:
+            return self.waiting.get(endpoint, 0)
+        return sum(self.waiting.values())
+
+    def stats(self):
+        endpoints = set(self.buckets) | set(self.retries)
+        return {
+            endpoint: {
+                "queued": self.waiting.get(endpoint, 0),
+                "in_flight": self.in_flight.get(endpoint, 0),
+                "retries": self.retries.get(endpoint, 0),
+                "throttled": self.throttled.get(endpoint, 0)
+            }
+            for endpoint in sorted(endpoints)
+        }
+
+_shared_scheduler = None
+_shared_settings = None
+
+def get_request_scheduler(config):
+    """Return the process-wide scheduler configured from the rate_limits section of config.yaml.
+
+    A changed rate_limits section (e.g. after a config reload) is applied to the existing scheduler.
+    """
+    global _shared_scheduler, _shared_settings
+    rate_limits = dict(config.get('rate_limits', {}))
+    retry_config = rate_limits.pop('retry', {})
+    settings = dict(
+        limits=rate_limits,
+        max_retries=retry_config.get('max_retries', 4),
+        base_delay=retry_config.get('base_delay', 1.0),
+        max_delay=retry_config.get('max_delay', 60.0)
+    )
+    if _shared_scheduler is None:
+        _shared_scheduler = RequestScheduler(**settings)
+    elif settings != _shared_settings:
+        _shared_scheduler.configure(**settings)
+    _shared_settings = settings
+    return _shared_scheduler
+
+def shared_scheduler_stats():
+    """Per-endpoint queue depth and retry counters of the process-wide scheduler, or None"""
+    return _shared_scheduler.stats() if _shared_scheduler else None
@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+def _normalize(value):
+    # Whitespace and case differences shouldn't turn a repeated question into a cache miss
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+class ResponseCache:
+    """LRU + TTL cache for AI replies with single-flight coalescing of identical in-flight requests.
+
+    A shared request keeps running while any caller still waits for it and is cancelled with the last one.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key: (expires_at, value)
+        self._inflight = {}  # key: asyncio.Task
+        self._waiters = {}  # asyncio.Task: callers still awaiting it
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def configure(self, max_entries=256, ttl_seconds=600):
+        """Apply new limits in place, e.g. after a config reload; entries already stored keep their expiry"""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def make_key(provider, request):
+        """Build a key from the provider and its full request (model, parameters and context)"""
+        payload = json.dumps({"provider": provider, "request": _normalize(request)}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key, compute):
+        """Return the cached value for key, or run compute() once for all concurrent callers"""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await self._wait(task)
+
+    async def lookup(self, key):
+        """The cached value for key, or the result of an identical request already in flight.
+
+        Returns None, counted as a miss, when there is neither, e.g. for a caller that streams its
+        own reply and stores it with set() afterwards.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            try:
+                return await self._wait(task)
+            except Exception:
+                return None  # The shared request failed; the caller makes its own
+        self.misses += 1
+        return None
+
+    async def _wait(self, task):
+        # Shield so one caller being cancelled doesn't cancel the request the others share;
+        # once the last caller gives up, nobody needs the answer and the upstream call is cancelled
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1:
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _finish(self, key, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None and task.result() is not None:
+            self.set(key, task.result())
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0
+        }
+
+_shared_cache = None
+_shared_settings = None
+
+def get_response_cache(config):
+    """Return the process-wide response cache, or None when it is disabled in ai_services.cache.
+
+    A changed cache section (e.g. after a config reload) is applied to the existing cache.
+    """
+    global _shared_cache, _shared_settings
+    cache_config = config.get('cache', {})
+    if not cache_config.get('enabled', True):
+        return None
+    settings = dict(
+        max_entries=cache_config.get('max_entries', 256),
+        ttl_seconds=cache_config.get('ttl_seconds', 600)
+    )
+    if _shared_cache is None:
+        _shared_cache = ResponseCache(**settings)
+    elif settings != _shared_settings:
+        _shared_cache.configure(**settings)
+    _shared_settings = settings
+    return _shared_cache
+
+def shared_cache_stats():
+    """Hit/miss counters of the process-wide cache, or None if it was never created"""
+    return _shared_cache.stats() if _shared_cache else None
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+class MemorySessionStore:
+    """Conversation state per client_id, kept in this process only"""
+
+    def __init__(self, ttl_seconds=7 * 24 * 3600):
+        self.ttl_seconds = ttl_seconds
+        self._sessions = {}  # client_id: (updated_at, state)
+
+    async def load(self, client_id):
+        entry = self._sessions.get(client_id)
+        if entry is None or time.time() - entry[0] > self.ttl_seconds:
+            return None
+        return json.loads(entry[1])
+
+    async def save(self, client_id, state):
+        # Stored serialized, like the SQLite backend, so callers can't mutate a saved session
+        self._sessions[client_id] = (time.time(), json.dumps(state))
+
+    async def delete(self, client_id):
+        self._sessions.pop(client_id, None)
+
+    async def purge_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        for client_id in [c for c, (updated_at, _) in self._sessions.items() if updated_at < cutoff]:
+            del self._sessions[client_id]
+
+    def close(self):
+        pass
+
+class SQLiteSessionStore:
+    """Conversation state per client_id in a SQLite file shared by every worker process"""
+
+    def __init__(self, path='sessions.db', ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # WAL lets the other workers keep reading while one of them writes
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "client_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+            self._db.commit()
+            return rows
+
+    async def load(self, client_id):
+        rows = await asyncio.to_thread(
+            self._execute, "SELECT state FROM sessions WHERE client_id = ? AND updated_at >= ?",
+            (client_id, time.time() - self.ttl_seconds)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    async def save(self, client_id, state):
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO sessions (client_id, state, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(client_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+            (client_id, json.dumps(state), time.time())
+        )
+
+    async def delete(self, client_id):
+        await asyncio.to_thread(self._execute, "DELETE FROM sessions WHERE client_id = ?", (client_id,))
+
+    async def purge_expired(self):
+        await asyncio.to_thread(
+            self._execute, "DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl_seconds,)
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+SESSION_BACKENDS = {
+    'memory': MemorySessionStore,
+    'sqlite': SQLiteSessionStore,
+}
+
+def create_session_store(sessions_config):
+    """Build the session store described by the web.sessions section of config.yaml"""
+    backend = sessions_config.get('backend', 'memory')
+    if backend not in SESSION_BACKENDS:
+        raise ValueError(f"Unknown session backend '{backend}', expected one of {', '.join(SESSION_BACKENDS)}")
+    ttl_seconds = sessions_config.get('ttl_seconds', 7 * 24 * 3600)
+    if backend == 'sqlite':
+        return SQLiteSessionStore(sessions_config.get('path', 'sessions.db'), ttl_seconds)
+    return MemorySessionStore(ttl_seconds)
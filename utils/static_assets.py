@@ -0,0 +1,121 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import time
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+REVALIDATE_CACHE = "no-cache"
+
+class StaticAsset:
+    """One file's bytes with its precomputed compressed variants and strong ETags"""
+
+    def __init__(self, path, signature):
+        self.signature = signature
+        with open(path, 'rb') as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+        self.content_type = content_type
+
+        digest = hashlib.sha256(body).hexdigest()
+        self.variants = {None: (body, f'"{digest[:32]}"')}  # encoding: (body, ETag)
+        if len(body) >= 512 and content_type.startswith(COMPRESSIBLE_TYPES):
+            compressed = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli:
+                compressed['br'] = brotli.compress(body, quality=11)
+            for encoding, data in compressed.items():
+                if len(data) < len(body):
+                    self.variants[encoding] = (data, f'"{digest[:32]}-{encoding}"')
+
+    def select(self, accept_encoding):
+        """Pick the smallest variant the client accepts"""
+        accepted = set()
+        for item in accept_encoding.split(','):
+            coding, _, params = item.strip().partition(';')
+            if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                accepted.add(coding.strip().lower())
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and (encoding in accepted or '*' in accepted):
+                return encoding
+        return None
+
+    def matches(self, if_none_match):
+        if if_none_match.strip() == '*':
+            return True
+        etags = {etag for _, etag in self.variants.values()}
+        # If-None-Match uses weak comparison, so a W/ prefix added by a proxy still matches
+        return any(tag.strip().removeprefix('W/') in etags for tag in if_none_match.split(','))
+
+class StaticAssets:
+    """Files of a directory served from memory with gzip/brotli variants, ETags and 304 responses.
+
+    A file is read and compressed once. Its mtime and size are checked at most every
+    check_interval seconds, and it is loaded again only when they change.
+    """
+
+    def __init__(self, directory, check_interval=1.0):
+        self.directory = os.path.realpath(directory)
+        self.check_interval = check_interval
+        self._assets = {}  # relative path: StaticAsset
+        self._next_check = {}  # relative path: monotonic time of the next stat
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                self.get(os.path.relpath(os.path.join(root, name), self.directory))
+
+    def _resolve(self, path):
+        full_path = os.path.realpath(os.path.join(self.directory, path))
+        if os.path.commonpath([full_path, self.directory]) != self.directory:
+            return None
+        return full_path
+
+    def get(self, path):
+        """The current StaticAsset for a path relative to the directory, or None if there is no such file"""
+        path = os.path.normpath(path)
+        now = time.monotonic()
+        asset = self._assets.get(path)
+        if asset is not None and now < self._next_check[path]:
+            return asset
+
+        full_path = self._resolve(path)
+        try:
+            stat = os.stat(full_path) if full_path else None
+        except OSError:
+            stat = None
+        if stat is None or not os.path.isfile(full_path):
+            self._assets.pop(path, None)
+            self._next_check.pop(path, None)
+            return None
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if asset is None or asset.signature != signature:
+            asset = StaticAsset(full_path, signature)
+            self._assets[path] = asset
+        self._next_check[path] = now + self.check_interval
+        return asset
+
+    def response(self, request, path):
+        """Response for one asset, or None when it does not exist"""
+        asset = self.get(path)
+        if asset is None:
+            return None
+        headers = {
+            # Revalidated on each use, which costs a 304 while the ETag still matches
+            "Cache-Control": REVALIDATE_CACHE,
+            "Vary": "Accept-Encoding"
+        }
+        encoding = asset.select(request.headers.get("accept-encoding", ""))
+        body, etag = asset.variants[encoding]
+        headers["ETag"] = etag
+        if asset.matches(request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type=asset.content_type, headers=headers)
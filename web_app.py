@@ -1,10 +1,17 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
 import json
-import yaml
-from ai_handler import AIHandler
+from ai_handler import AIHandler, AIResponseError
 from utils.logger import setup_logger
+from utils.response_cache import get_response_cache, shared_cache_stats
+from utils.request_scheduler import get_request_scheduler, shared_scheduler_stats
+from utils.provider_router import get_provider_router
+from utils.metrics import registry, ERRORS
+from utils.session_store import create_session_store
+from utils.config_service import get_config_service
+from utils.static_assets import StaticAssets
+from provider_clients import close_provider_clients
+from message_store import get_message_store
 import asyncio
 import uvicorn
 import sys
@@ -13,12 +20,21 @@ import threading
 from datetime import datetime
 import time
 import os
+import itertools
+import logging
+from collections import deque
+from contextlib import aclosing
 
 app = FastAPI()
 logger = setup_logger(debug=True)
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+WS_COMMANDS = {"debug", "debug_clear", "init", "chat", "cancel"}
+WS_COMMAND_SECONDS = registry.histogram(
+    'teams_chat_ws_command_seconds', 'WebSocket command round-trip time', ['command'])
+ACTIVE_CONNECTIONS = registry.gauge('teams_chat_ws_active_connections', 'Open WebSocket connections')
+
+# The web UI's files, held in memory with gzip/brotli variants and ETags; re-read when they change on disk
+static_assets = StaticAssets("static")
 
 # Global server instance
 server = None
@@ -38,66 +54,239 @@ class GracefulShutdown:
 
 shutdown_handler = GracefulShutdown()
 
+# Close code for a socket whose client_id was taken over by a newer connection; the page doesn't reconnect
+REPLACED_CLOSE_CODE = 4000
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: dict = {}  # websocket_id: WebSocket
         self.ai_handlers: dict = {}  # websocket_id: AIHandler
+        self.send_queues: dict = {}  # websocket_id: asyncio.Queue of outgoing messages
+        self.senders: dict = {}  # websocket_id: task writing the send queue to the socket
+        self.requests: dict = {}  # websocket_id: {request_id: asyncio.Task}
 
-    async def connect(self, websocket: WebSocket, client_id: str):
+    async def connect(self, websocket: WebSocket, client_id: str, send_queue_size: int = 100):
         await websocket.accept()
+        previous = self.active_connections.get(client_id)
+        if previous is not None:
+            # e.g. a duplicated tab, which copies clientId from sessionStorage: the newest socket takes over
+            self._release(client_id)
+            try:
+                await previous.close(code=REPLACED_CLOSE_CODE, reason="Replaced by a newer connection")
+            except RuntimeError:
+                pass  # Already closed by the client
         self.active_connections[client_id] = websocket
+        # Bounded, so a client that reads slowly holds back its own replies instead of growing memory
+        self.send_queues[client_id] = asyncio.Queue(maxsize=send_queue_size)
+        self.senders[client_id] = asyncio.create_task(self._send_loop(websocket, self.send_queues[client_id]))
+        self.requests[client_id] = {}
+        ACTIVE_CONNECTIONS.set(len(self.active_connections))
+
+    async def _send_loop(self, websocket: WebSocket, queue: asyncio.Queue):
+        while True:
+            await websocket.send_json(await queue.get())
+
+    def _release(self, client_id: str):
+        # Stops everything tied to the client's current socket; its conversation is kept
+        for task in self.requests.pop(client_id, {}).values():
+            task.cancel()
+        if client_id in self.senders:
+            self.senders.pop(client_id).cancel()
+        self.send_queues.pop(client_id, None)
+        self.active_connections.pop(client_id, None)
 
     def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
+        self._release(client_id)
         if client_id in self.ai_handlers:
             del self.ai_handlers[client_id]
+        ACTIVE_CONNECTIONS.set(len(self.active_connections))
+
+    def start_request(self, client_id: str, request_id, coro):
+        requests = self.requests[client_id]
+        task = asyncio.create_task(coro)
+        requests[request_id] = task
+        task.add_done_callback(lambda t: requests.pop(request_id) if requests.get(request_id) is t else None)
+        return task
+
+    async def cancel_requests(self, client_id: str, request_ids=None):
+        """Cancel a client's in-flight requests (all of them by default) and wait until they have stopped"""
+        requests = self.requests.get(client_id, {})
+        cancelled = {r: task for r, task in requests.items() if request_ids is None or r in request_ids}
+        for task in cancelled.values():
+            task.cancel()
+        await asyncio.gather(*cancelled.values(), return_exceptions=True)
+        for request_id in cancelled:
+            await self.send_message("Request cancelled", client_id, "cancelled", request_id=request_id)
+        return list(cancelled)
 
     async def disconnect_all(self):
         for client_id in list(self.active_connections.keys()):
             await self.active_connections[client_id].close()
             self.disconnect(client_id)
 
-    async def send_message(self, message: str, client_id: str, message_type: str = "ai"):
+    async def send_message(self, message: str, client_id: str, message_type: str = "ai", **fields):
         if client_id in self.active_connections:
-            await self.active_connections[client_id].send_json({
+            # Waits while the client's queue is full, which also slows down a stream feeding it
+            await self.send_queues[client_id].put({
                 "type": message_type,
-                "content": message
+                "content": message,
+                **fields
             })
 
 manager = ConnectionManager()
 
+# Parsed once and reloaded only when the file changes, so handling a command never touches the disk
+config_service = get_config_service("config.yaml")
+
+def load_web_settings():
+    return config_service.get().get("web", {})
+
+def level_number(level):
+    number = logging.getLevelName(str(level).upper())
+    return number if isinstance(number, int) else logging.DEBUG
+
 class DebugManager:
-    def __init__(self):
+    def __init__(self, max_messages: int = 100):
         self.debug_mode = False
-        self.debug_messages = []
-        self.max_messages = 100  # Keep last 100 debug messages
+        self.max_messages = max_messages
+        # Ring buffer of the newest entries; seq numbers keep increasing across evictions and clears
+        self.debug_messages = deque(maxlen=max_messages)
+        self.next_seq = 1
+        self.subscribers = set()  # asyncio.Queue per live stream
 
     def add_message(self, message: str, level: str = "DEBUG"):
         if self.debug_mode:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
             debug_entry = {
+                "seq": self.next_seq,
                 "timestamp": timestamp,
                 "level": level,
                 "message": message
             }
+            self.next_seq += 1
             self.debug_messages.append(debug_entry)
-            if len(self.debug_messages) > self.max_messages:
-                self.debug_messages.pop(0)
-            logger.debug(f"{level}: {message}")
+            for subscriber in self.subscribers:
+                if subscriber.full():
+                    # A stalled reader loses its oldest entries; the seq gap tells it so
+                    subscriber.get_nowait()
+                subscriber.put_nowait(debug_entry)
+            logger.debug("%s: %s", level, message)
+
+    def get_messages(self, since: int = 0, level: str = None):
+        """Entries with a sequence number above since, optionally at or above a level"""
+        first_seq = self.debug_messages[0]["seq"] if self.debug_messages else self.next_seq
+        entries = itertools.islice(self.debug_messages, max(0, since - first_seq + 1), None)
+        if level:
+            min_level = level_number(level)
+            entries = (e for e in entries if level_number(e["level"]) >= min_level)
+        return list(entries)
 
-    def get_messages(self):
-        return self.debug_messages
+    def subscribe(self):
+        subscriber = asyncio.Queue(maxsize=self.max_messages)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
 
     def clear_messages(self):
-        self.debug_messages = []
+        self.debug_messages.clear()
+
+    def resize(self, max_messages: int):
+        """Keep up to max_messages entries from now on; the newest ones already buffered are kept"""
+        if max_messages != self.max_messages:
+            self.max_messages = max_messages
+            self.debug_messages = deque(self.debug_messages, maxlen=max_messages)
+
+debug_manager = DebugManager(load_web_settings().get("debug_buffer_size", 1000))
+
+# Conversation state per client_id; use the sqlite backend to share sessions between workers and restarts.
+# Like web.host/port/workers and notifications, web.sessions is only read at startup.
+session_store = create_session_store(load_web_settings().get("sessions", {}))
 
-debug_manager = DebugManager()
+def apply_config(config):
+    """Carry a reloaded config.yaml over to the objects shared by every session"""
+    get_request_scheduler(config)
+    get_response_cache(config.get("ai_services", {}))
+    get_provider_router(config)
+    debug_manager.resize(config.get("web", {}).get("debug_buffer_size", 1000))
+
+config_service.add_listener(apply_config)
+
+async def save_session(client_id: str):
+    ai_handler = manager.ai_handlers.get(client_id)
+    if not ai_handler:
+        return
+    try:
+        await session_store.save(client_id, ai_handler.export_state())
+    except Exception as e:
+        ERRORS.inc(component='sessions')
+        debug_manager.add_message(f"Error saving session for {client_id}: {str(e)}", "ERROR")
+
+async def resume_session(client_id: str):
+    """Rebuild a client's AI handler from its stored session, e.g. after a restart or on another worker"""
+    try:
+        session = await session_store.load(client_id)
+        if not session:
+            return None
+        ai_handler = AIHandler(config_service.get(), session["service_type"], logger)
+        ai_handler.restore_state(session)
+    except Exception as e:
+        ERRORS.inc(component='sessions')
+        debug_manager.add_message(f"Error resuming session for {client_id}: {str(e)}", "ERROR")
+        return None
+    manager.ai_handlers[client_id] = ai_handler
+    debug_manager.add_message(f"Resumed {session['service_type']} session for {client_id}")
+    return ai_handler
+
+# Receives Graph change notifications for monitored chats; None unless enabled in config.yaml
+chat_ingestion = None
+
+@app.on_event("startup")
+async def start_chat_ingestion():
+    global chat_ingestion
+    config = config_service.get()
+    if not config.get("notifications", {}).get("enabled"):
+        return
+
+    from chat_notifications import ChatIngestionService
+    chat_ingestion = ChatIngestionService(config, logger)
+    await chat_ingestion.start(ready=wait_until_listening)
+
+async def wait_until_listening():
+    # Startup hooks finish before uvicorn opens its socket, and Graph calls /notifications while a
+    # subscription is being created. Without a Server handle (e.g. started by the uvicorn CLI) the
+    # first attempt may fail and is retried after notifications.subscribe_retry_seconds.
+    while server is not None and not server.started:
+        await asyncio.sleep(0.1)
+
+@app.on_event("shutdown")
+async def stop_chat_ingestion():
+    if chat_ingestion:
+        await chat_ingestion.stop()
+
+@app.on_event("shutdown")
+async def close_ai_clients():
+    await close_provider_clients()
+
+@app.on_event("startup")
+async def purge_expired_sessions():
+    await session_store.purge_expired()
+
+@app.on_event("shutdown")
+async def close_session_store():
+    session_store.close()
 
 @app.get("/", response_class=HTMLResponse)
-async def get():
-    with open("static/index.html") as f:
-        return f.read()
+async def get(request: Request):
+    return static_assets.response(request, "index.html")
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def get_static(path: str, request: Request):
+    response = static_assets.response(request, path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
 
 @app.post("/shutdown")
 async def shutdown():
@@ -116,74 +305,262 @@ async def toggle_debug():
     return {"status": status}
 
 @app.get("/debug/messages")
-async def get_debug_messages():
-    return {"messages": debug_manager.debug_messages}
+async def get_debug_messages(since: int = 0, level: str = None):
+    return {"messages": debug_manager.get_messages(since, level), "next_seq": debug_manager.next_seq}
+
+@app.get("/debug/stream")
+async def stream_debug_messages(request: Request, since: int = 0, level: str = None):
+    """Server-Sent Events stream of new debug entries, resumable via ?since= or Last-Event-ID"""
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = max(since, int(last_event_id))
+    min_level = level_number(level) if level else None
+
+    async def events():
+        # Subscribe before reading the backlog so nothing added in between is missed
+        subscriber = debug_manager.subscribe()
+        last_seq = since
+        try:
+            for entry in debug_manager.get_messages(since, level):
+                last_seq = entry["seq"]
+                yield f"id: {entry['seq']}\nevent: debug\ndata: {json.dumps(entry)}\n\n"
+            while True:
+                try:
+                    entry = await asyncio.wait_for(subscriber.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if entry["seq"] <= last_seq or (min_level and level_number(entry["level"]) < min_level):
+                    continue
+                last_seq = entry["seq"]
+                yield f"id: {entry['seq']}\nevent: debug\ndata: {json.dumps(entry)}\n\n"
+        finally:
+            debug_manager.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.post("/debug/clear")
 async def clear_debug_messages():
     debug_manager.clear_messages()
     return {"status": "cleared"}
 
+@app.get("/ai/cache")
+async def get_ai_cache_stats():
+    stats = shared_cache_stats()
+    return {"enabled": stats is not None, "stats": stats or {}}
+
+@app.get("/scheduler")
+async def get_scheduler_stats():
+    return {"endpoints": shared_scheduler_stats() or {}}
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+def require_message_store():
+    store = get_message_store(config_service.get())
+    if store is None:
+        raise HTTPException(status_code=503, detail="The message store is not enabled")
+    return store
+
+@app.get("/messages/search")
+async def search_messages(q: str, chat_id: str = None, limit: int = 50):
+    store = require_message_store()
+    try:
+        results = await asyncio.to_thread(store.search, q, chat_id, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": results}
+
+@app.get("/messages/replay")
+async def replay_messages(chat_id: str, since: str = None, limit: int = 500):
+    store = require_message_store()
+    try:
+        entries = await asyncio.to_thread(store.replay, chat_id, since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"entries": entries}
+
+@app.post("/notifications")
+async def receive_notifications(request: Request):
+    # Subscription validation handshake: Graph expects the token echoed back as plain text
+    validation_token = request.query_params.get("validationToken")
+    if validation_token is not None:
+        return PlainTextResponse(validation_token)
+
+    if not chat_ingestion:
+        raise HTTPException(status_code=503, detail="Change notifications are not enabled")
+
+    payload = await request.json()
+    accepted = [chat_ingestion.enqueue(notification) for notification in payload.get("value", [])]
+    debug_manager.add_message(f"Received {len(accepted)} change notifications, {sum(accepted)} accepted")
+    # Anything other than 2xx makes Graph redeliver, which is what we want when the queue is full
+    if not all(accepted):
+        raise HTTPException(status_code=503, detail="Notification queue unavailable")
+    return Response(status_code=202)
+
+async def handle_command(client_id: str, data: dict):
+    command = data.get("command")
+    request_id = data.get("request_id")
+    debug_manager.add_message(f"Received command from {client_id}: {command}")
+    
+    if command == "debug":
+        debug_manager.debug_mode = bool(data.get("enabled"))
+        logger.info(f"Debug mode {'enabled' if debug_manager.debug_mode else 'disabled'}")
+    
+    elif command == "debug_clear":
+        debug_manager.clear_messages()
+    
+    elif command == "init":
+        service_type = data.get("service_type")
+        debug_manager.add_message(f"Initializing {service_type} for client {client_id}")
+        
+        if service_type not in ["openai", "claude", "auto"]:
+            debug_manager.add_message(f"Invalid service type: {service_type}", "ERROR")
+            await manager.send_message("Invalid AI service type", client_id, "error", request_id=request_id)
+            return
+        
+        try:
+            # Replies still in flight belong to the conversation being replaced
+            await manager.cancel_requests(client_id)
+            ai_handler = AIHandler(config_service.get(), service_type, logger)
+            status = f"Connected to {service_type.upper()} service"
+            session = await session_store.load(client_id)
+            if session and session.get("service_type") == service_type:
+                ai_handler.restore_state(session)
+                status += f" (resumed {len(ai_handler.conversation_history) - 1} messages)"
+            manager.ai_handlers[client_id] = ai_handler
+            await save_session(client_id)
+            debug_manager.add_message(f"AI handler created for {client_id}")
+            await manager.send_message(
+                status, 
+                client_id, 
+                "system",
+                request_id=request_id
+            )
+        except Exception as e:
+            ERRORS.inc(component='websocket')
+            debug_manager.add_message(f"Error initializing AI service: {str(e)}", "ERROR")
+            await manager.send_message(f"Error initializing AI service: {str(e)}", client_id, "error", request_id=request_id)
+    
+    elif command == "chat":
+        if client_id not in manager.ai_handlers and not await resume_session(client_id):
+            debug_manager.add_message(f"No AI handler for client {client_id}", "ERROR")
+            await manager.send_message("AI service not initialized", client_id, "error", request_id=request_id)
+            return
+        
+        message = data.get("message", "").strip()
+        debug_manager.add_message(f"Chat message from {client_id}: {message}")
+        
+        if message.lower() == '/clear':
+            await manager.cancel_requests(client_id)
+            manager.ai_handlers[client_id].clear_conversation()
+            debug_manager.add_message(f"Conversation cleared for {client_id}")
+            await manager.send_message("Conversation history cleared", client_id, "system", request_id=request_id)
+        elif message and data.get("stream"):
+            ai_handler = manager.ai_handlers[client_id]
+            chunks = []
+            try:
+                # Closed right away on cancel, so the handler's lock and the upstream stream are released
+                async with aclosing(ai_handler.stream_ai_response(message)) as stream:
+                    async for chunk in stream:
+                        chunks.append(chunk)
+                        await manager.send_message(chunk, client_id, "ai_chunk", model=ai_handler.model,
+                                                   request_id=request_id)
+            except Exception as e:
+                debug_manager.add_message(f"Error streaming AI response: {str(e)}", "ERROR")
+                await manager.send_message(f"Error getting AI response: {str(e)}", client_id, "error",
+                                           request_id=request_id)
+                return
+            response = "".join(chunks)
+            debug_manager.add_message(f"AI ({ai_handler.model}) response: {response}")
+            debug_manager.add_message(f"AI response streamed to {client_id}")
+            await manager.send_message(f"{ai_handler.model}: {response}", client_id, "ai_done", model=ai_handler.model,
+                                       request_id=request_id)
+        elif message:
+            try:
+                response, model = await manager.ai_handlers[client_id].get_ai_response_async(message)
+            except AIResponseError as e:
+                debug_manager.add_message(f"Error getting AI response: {str(e)}", "ERROR")
+                await manager.send_message(str(e), client_id, "error", request_id=request_id)
+                return
+            debug_manager.add_message(f"AI ({model}) response: {response}")
+            debug_manager.add_message(f"AI response generated for {client_id}")
+            await manager.send_message(f"{model}: {response}", client_id, "ai", request_id=request_id)
+        await save_session(client_id)
+
+async def run_command(client_id: str, data: dict):
+    command = data.get("command")
+    with WS_COMMAND_SECONDS.time(command=command if command in WS_COMMANDS else "unknown"):
+        try:
+            await handle_command(client_id, data)
+        except Exception as e:
+            ERRORS.inc(component='websocket')
+            debug_manager.add_message(f"Error handling {command} from {client_id}: {str(e)}", "ERROR")
+            await manager.send_message(f"Error handling {command}: {str(e)}", client_id, "error",
+                                       request_id=data.get("request_id"))
+
+def is_pipelined(data: dict):
+    """Prompts run concurrently; init and /clear reset the conversation, so they run in order on the socket"""
+    return data.get("command") == "chat" and data.get("message", "").strip().lower() != '/clear'
+
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
-    await manager.connect(websocket, client_id)
+    settings = load_web_settings()
+    max_requests = settings.get("max_requests_per_client", 4)
+    await manager.connect(websocket, client_id, settings.get("send_queue_size", 100))
     debug_manager.add_message(f"New client connected: {client_id}")
+    request_ids = itertools.count(1)
     
     try:
         while True:
             data = await websocket.receive_json()
+            if manager.active_connections.get(client_id) is not websocket:
+                break  # Replaced by a newer connection, which now owns the client's state
             command = data.get("command")
-            debug_manager.add_message(f"Received command from {client_id}: {command}")
-            
-            if command == "init":
-                service_type = data.get("service_type")
-                debug_manager.add_message(f"Initializing {service_type} for client {client_id}")
-                
-                if service_type not in ["openai", "claude"]:
-                    debug_manager.add_message(f"Invalid service type: {service_type}", "ERROR")
-                    await manager.send_message("Invalid AI service type", client_id, "error")
-                    continue
-                
-                try:
-                    with open("config.yaml") as f:
-                        config = yaml.safe_load(f)
-                    
-                    manager.ai_handlers[client_id] = AIHandler(config, service_type, logger)
-                    debug_manager.add_message(f"AI handler created for {client_id}")
-                    await manager.send_message(
-                        f"Connected to {service_type.upper()} service", 
-                        client_id, 
-                        "system"
-                    )
-                except Exception as e:
-                    debug_manager.add_message(f"Error initializing AI service: {str(e)}", "ERROR")
-                    await manager.send_message(f"Error initializing AI service: {str(e)}", client_id, "error")
-            
-            elif command == "chat":
-                if client_id not in manager.ai_handlers:
-                    debug_manager.add_message(f"No AI handler for client {client_id}", "ERROR")
-                    await manager.send_message("AI service not initialized", client_id, "error")
-                    continue
-                
-                message = data.get("message", "").strip()
-                debug_manager.add_message(f"Chat message from {client_id}: {message}")
-                
-                if message.lower() == '/clear':
-                    manager.ai_handlers[client_id].clear_conversation()
-                    debug_manager.add_message(f"Conversation cleared for {client_id}")
-                    await manager.send_message("Conversation history cleared", client_id, "system")
-                elif message:
-                    response, model = manager.ai_handlers[client_id].get_ai_response(message)
-                    debug_manager.add_message(f"AI ({model}) response: {response}")
-                    debug_manager.add_message(f"AI response generated for {client_id}")
-                    await manager.send_message(f"{model}: {response}", client_id, "ai")
+            # Every reply carries the command's request_id; clients that don't send one get a generated one
+            request_id = data.setdefault("request_id", f"req-{next(request_ids)}")
+            requests = manager.requests[client_id]
+
+            if command == "cancel":
+                target = data.get("target_id")
+                with WS_COMMAND_SECONDS.time(command=command):
+                    if not await manager.cancel_requests(client_id, [target]):
+                        await manager.send_message(f"No request {target} in flight", client_id, "error",
+                                                   request_id=request_id)
+            elif not is_pipelined(data):
+                await run_command(client_id, data)
+            elif request_id in requests:
+                await manager.send_message(f"Request {request_id} is already in flight", client_id, "error",
+                                           request_id=request_id)
+            elif len(requests) >= max_requests:
+                await manager.send_message(f"Too many requests in flight (limit {max_requests})", client_id, "error",
+                                           request_id=request_id)
+            else:
+                manager.start_request(client_id, request_id, run_command(client_id, data))
             
     except WebSocketDisconnect:
         debug_manager.add_message(f"Client disconnected: {client_id}")
-        manager.disconnect(client_id)
+    finally:
+        # A reconnect under the same client_id may already have replaced this socket
+        if manager.active_connections.get(client_id) is websocket:
+            manager.disconnect(client_id)
 
 def run_server():
     global server
+    settings = load_web_settings()
+    workers = settings.get("workers", 1)
+    if workers > 1:
+        # Every worker imports this module on its own; only the session store is shared between them
+        if config_service.get().get("notifications", {}).get("enabled"):
+            # Each worker would subscribe, poll and answer every monitored message on its own
+            logger.error(f"Change notifications need a single worker process, but web.workers is {workers}")
+            sys.exit(1)
+        if settings.get("sessions", {}).get("backend", "memory") == "memory":
+            logger.warning(f"Running {workers} workers with the in-memory session store, sessions will not follow clients between workers")
+        uvicorn.run("web_app:app", host="0.0.0.0", port=8000, workers=workers)
+        return
+
     config = uvicorn.Config(app, host="0.0.0.0", port=8000, reload=False)
     server = uvicorn.Server(config)
     try: